@@ -1,24 +1,43 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_moment import Moment # Import Flask-Moment
 from config import Config
 
 db = SQLAlchemy()
 login = LoginManager()
-migrate = Migrate()
 moment = Moment() # Initialize Flask-Moment
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    from app import db_profiles, query_stats, metrics
+    db_profiles.configure_engine_options(app)
+
     db.init_app(app)
+    db_profiles.init_app(app, db)
+    query_stats.init_app(app, db)
+    metrics.init_app(app, db)
     login.init_app(app)
-    migrate.init_app(app, db)
     moment.init_app(app) # Register Flask-Moment with the app
 
+    from app import cart, page_cache, fragment_cache, platform_stats, pubsub, user_cache
+    user_cache.init_app(app)
+    cart.init_app(app)
+    page_cache.init_app(app)
+    fragment_cache.init_app(app)
+    platform_stats.init_app(app)
+    pubsub.init_app(app)
+
+    from app import assets
+    assets.init_app(app)
+
+    from app.utils import image_variants, image_srcset, image_url
+    app.jinja_env.globals.update(image_variants=image_variants,
+                                 image_srcset=image_srcset,
+                                 image_url=image_url)
+
     login.login_view = 'auth.login'
     login.login_message_category = 'info'
 
@@ -35,16 +54,14 @@ def create_app(config_class=Config):
     from app.customer import bp as customer_bp
     app.register_blueprint(customer_bp)
 
-    # Create default admin
-    with app.app_context():
-        from app.models import User
-        # Create tables if they don't exist before creating admin
-        db.create_all()
-        User.create_default_admin(
-            username=app.config['ADMIN_USERNAME'],
-            email=app.config['ADMIN_EMAIL'],
-            password=app.config['ADMIN_PASSWORD']
-        )
+    from app.api import bp as api_bp
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+
+    from app import cli
+    cli.init_app(app)
+
+    # Keep the full-text search index in sync with catalog writes
+    from app import search
 
     return app
 
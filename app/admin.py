@@ -1,10 +1,15 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import os
+import click
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required, current_user
-from app.models import User, Shop, Product, Category
+from app.models import User, Shop, Product, Category, recompute_rating_aggregates, recompute_unread_notifications
 from app.forms import UserForm, CategoryForm, BulkApproveForm, ShopForm
-from app import db
-from app.utils import save_image
+from app import db, exports, rollups, search
+from app.platform_stats import platform_stats
+from app.utils import save_image, process_image, image_variants
+from app.pagination import keyset_paginate
 from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from werkzeug.datastructures import FileStorage
 
 bp = Blueprint('admin', __name__)
@@ -16,18 +21,14 @@ def dashboard():
         flash('Access denied.', 'danger')
         return redirect(url_for('customer.index'))
 
-    users = User.query.all()
-    shops = Shop.query.all()
-    categories = Category.query.all()
-    pending_count = User.query.filter_by(is_approved=False).count()
+    stats = platform_stats()
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
-    recent_shops = Shop.query.order_by(Shop.created_at.desc()).limit(5).all()
+    recent_shops = Shop.query.options(joinedload(Shop.owner))\
+                             .order_by(Shop.created_at.desc()).limit(5).all()
 
     return render_template('admin/dashboard.html',
-                         users=users,
-                         shops=shops,
-                         categories=categories,
-                         pending_count=pending_count,
+                         stats=stats,
+                         pending_count=stats['pending_approval'],
                          recent_users=recent_users,
                          recent_shops=recent_shops)
 
@@ -38,9 +39,9 @@ def user_list():
         flash('Access denied.', 'danger')
         return redirect(url_for('customer.index'))
 
-    users = User.query.all()
+    users = keyset_paginate(User.query, [User.created_at, User.id])
     pending_count = User.query.filter_by(is_approved=False).count()
-    return render_template('admin/users.html', users=users, pending_count=pending_count)
+    return render_template('admin/users.html', users=users.items, pagination=users, pending_count=pending_count)
 
 @bp.route('/users/create', methods=['GET', 'POST'])
 @login_required
@@ -106,8 +107,15 @@ def shop_list():
         flash('Access denied.', 'danger')
         return redirect(url_for('customer.index'))
 
-    shops = Shop.query.all()
-    return render_template('admin/shops.html', shops=shops)
+    shops = keyset_paginate(Shop.query.options(joinedload(Shop.owner)), [Shop.created_at, Shop.id])
+    # Product counts for the whole page in one grouped query
+    product_counts = dict(
+        db.session.query(Product.shop_id, db.func.count(Product.id))
+                  .filter(Product.shop_id.in_([shop.id for shop in shops.items]))
+                  .group_by(Product.shop_id)
+    )
+    return render_template('admin/shops.html', shops=shops.items, pagination=shops,
+                           product_counts=product_counts)
 
 @bp.route('/shops/<int:shop_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -149,8 +157,22 @@ def product_list():
         flash('Access denied.', 'danger')
         return redirect(url_for('customer.index'))
 
-    products = Product.query.all()
-    return render_template('admin/products.html', products=products)
+    products = keyset_paginate(Product.query.options(joinedload(Product.shop), joinedload(Product.category)),
+                               [Product.created_at, Product.id])
+    return render_template('admin/products.html', products=products.items, pagination=products)
+
+@bp.route('/export')
+@login_required
+def export():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('customer.index'))
+
+    try:
+        return exports.export_response(request.args)
+    except exports.ExportError as error:
+        flash(str(error), 'danger')
+        return redirect(url_for('admin.product_list'))
 
 @bp.route('/products/<int:product_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -306,3 +328,41 @@ def bulk_user_action():
             flash('Invalid bulk action.', 'danger')
 
     return redirect(url_for('admin.pending_users'))
+
+# --- ADMIN CLI COMMANDS ---
+
+@bp.cli.command('recompute-ratings')
+def recompute_ratings_command():
+    """Recompute stored product and shop rating aggregates from the Rating table."""
+    recompute_rating_aggregates()
+    click.echo('Rating aggregates recomputed.')
+
+@bp.cli.command('recompute-notification-counts')
+def recompute_notification_counts_command():
+    """Recompute every user's stored unread notification count from the Notification table."""
+    recompute_unread_notifications()
+    click.echo('Unread notification counts recomputed.')
+
+@bp.cli.command('rebuild-shop-stats')
+def rebuild_shop_stats_command():
+    """Rebuild the shop_daily_stats sales rollup from Order/OrderItem."""
+    rows = rollups.rebuild_shop_daily_stats()
+    click.echo(f'Shop daily stats rebuilt ({rows} rows).')
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the product and shop full-text search index from the catalog tables."""
+    search.rebuild_index()
+    click.echo('Search index rebuilt.')
+
+@bp.cli.command('process-images')
+def process_images_command():
+    """Generate resized variants for uploads that don't have them yet."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    filenames = [row[0] for row in db.session.query(Product.image).filter(Product.image.isnot(None))]
+    filenames += [row[0] for row in db.session.query(Shop.logo).filter(Shop.logo.isnot(None))]
+    processed = 0
+    for filename in set(filenames):
+        if image_variants(filename) is None and os.path.exists(os.path.join(upload_folder, filename)):
+            processed += process_image(upload_folder, filename)
+    click.echo(f'Processed {processed} image(s).')
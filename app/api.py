@@ -0,0 +1,214 @@
+# app/api.py
+import hashlib
+import json
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context, url_for
+from werkzeug.exceptions import HTTPException
+from app import catalog
+from app.models import Shop, Product
+from app.utils import image_url
+
+# Read-only JSON view of the storefront catalog for API clients (the mobile app). Lists
+# come from the same queries as the HTML pages (app/catalog.py) and use the same keyset
+# cursors. Every response carries a weak ETag computed from the rows' versions before
+# anything is serialized, so a matching If-None-Match costs the query but no encoding.
+#
+# Query parameters common to every endpoint:
+#   fields=id,name,price   only these fields of each object (sparse fieldset)
+#   per_page=50            page size, capped at API_MAX_PER_PAGE
+#   after= / before=       cursors from the `links` of a previous page
+
+bp = Blueprint('api', __name__)
+
+# Objects serialized per body chunk while streaming a list
+STREAM_CHUNK_SIZE = 50
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _image(filename):
+    return image_url(filename) if filename else None
+
+
+# Per resource: the serializable fields, and the row values that change whenever the
+# serialized object does (the ETag input). Products and shops bump cache_version on every
+# update, including rating aggregate changes.
+RESOURCES = {
+    'product': {
+        'fields': {
+            'id': lambda p: p.id,
+            'name': lambda p: p.name,
+            'description': lambda p: p.description,
+            'price': lambda p: p.price,
+            'image': lambda p: _image(p.image),
+            'shop_id': lambda p: p.shop_id,
+            'category_id': lambda p: p.category_id,
+            'rating_avg': lambda p: p.average_rating(),
+            'rating_count': lambda p: p.rating_count,
+            'created_at': lambda p: _isoformat(p.created_at),
+        },
+        'version': lambda p: (p.id, p.cache_version, p.image),
+    },
+    'shop': {
+        'fields': {
+            'id': lambda s: s.id,
+            'name': lambda s: s.name,
+            'description': lambda s: s.description,
+            'location': lambda s: s.location,
+            'whatsapp_number': lambda s: s.formatted_whatsapp() or None,
+            'logo': lambda s: _image(s.logo),
+            'rating_avg': lambda s: s.average_rating(),
+            'rating_count': lambda s: s.rating_count,
+            'created_at': lambda s: _isoformat(s.created_at),
+        },
+        'version': lambda s: (s.id, s.cache_version, s.logo),
+    },
+    'category': {
+        'fields': {
+            'id': lambda c: c.id,
+            'name': lambda c: c.name,
+            'shop_id': lambda c: c.shop_id,
+        },
+        'version': lambda c: (c.id, c.name, c.shop_id),
+    },
+    'rating': {
+        'fields': {
+            'id': lambda r: r.id,
+            'value': lambda r: r.value,
+            'comment': lambda r: r.comment,
+            'product_id': lambda r: r.product_id,
+            'created_at': lambda r: _isoformat(r.created_at),
+        },
+        'version': lambda r: (r.id, r.value, r.comment),
+    },
+}
+
+
+@bp.errorhandler(HTTPException)
+def _json_error(error):
+    return jsonify({'error': error.description}), error.code
+
+
+def _selected_fields(resource):
+    available = RESOURCES[resource]['fields']
+    requested = request.args.get('fields')
+    if not requested:
+        return list(available)
+    fields = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        abort(400, f"Unknown {resource} field(s): {', '.join(unknown)}. "
+                   f"Available: {', '.join(available)}.")
+    return fields
+
+
+def _per_page():
+    per_page = request.args.get('per_page', type=int)
+    if per_page is None:
+        return None
+    return max(1, min(per_page, current_app.config['API_MAX_PER_PAGE']))
+
+
+def _links(pagination):
+    args = dict(request.view_args, **pagination.query_args)
+    return {
+        'next': url_for(request.endpoint, **args, after=pagination.next_cursor) if pagination.has_next else None,
+        'prev': url_for(request.endpoint, **args, before=pagination.prev_cursor) if pagination.has_prev else None,
+    }
+
+
+def _etag(resource, fields, objects, links):
+    version = RESOURCES[resource]['version']
+    digest = hashlib.sha1(repr((resource, fields, links)).encode())
+    for obj in objects:
+        digest.update(repr(version(obj)).encode())
+    return digest.hexdigest()
+
+
+def _encode(obj, serializers):
+    return json.dumps({name: serialize(obj) for name, serialize in serializers.items()},
+                      separators=(',', ':'), ensure_ascii=False)
+
+
+def _stream_list(objects, serializers, links):
+    yield '{"data":['
+    for start in range(0, len(objects), STREAM_CHUNK_SIZE):
+        chunk = ','.join(_encode(obj, serializers) for obj in objects[start:start + STREAM_CHUNK_SIZE])
+        yield chunk if start == 0 else ',' + chunk
+    yield '],"links":' + json.dumps(links, separators=(',', ':')) + '}'
+
+
+def _respond(resource, objects, pagination=None, many=True):
+    """Serialize `objects` (or a single object when many=False) as a conditional response."""
+    fields = _selected_fields(resource)
+    serializers = {name: RESOURCES[resource]['fields'][name] for name in fields}
+    links = _links(pagination) if pagination is not None else None
+    etag = _etag(resource, fields, objects if many else [objects], links)
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif many:
+        # The rows are already loaded; encode them chunk by chunk instead of building one big string
+        response = Response(stream_with_context(_stream_list(objects, serializers, links)),
+                            mimetype='application/json')
+    else:
+        response = Response('{"data":' + _encode(objects, serializers) + '}', mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['API_CACHE_MAX_AGE']}"
+    return response
+
+
+@bp.route('/products')
+def products():
+    sort_by = request.args.get('sort_by')
+    if sort_by is not None and sort_by not in catalog.PRODUCT_SORTS:
+        abort(400, f"sort_by must be one of: {', '.join(catalog.PRODUCT_SORTS)}.")
+    page = catalog.search_products(request.args.get('q', '').strip(),
+                                   request.args.get('min_price', type=float),
+                                   request.args.get('max_price', type=float),
+                                   request.args.get('category_id', type=int),
+                                   sort_by, per_page=_per_page())
+    return _respond('product', page.items, page)
+
+
+@bp.route('/products/<int:product_id>')
+def product(product_id):
+    product = Product.query.filter_by(id=product_id, is_active=True).first_or_404(
+        description='Product not found.')
+    return _respond('product', product, many=False)
+
+
+@bp.route('/products/<int:product_id>/ratings')
+def product_ratings(product_id):
+    Product.query.filter_by(id=product_id, is_active=True).first_or_404(description='Product not found.')
+    page = catalog.product_ratings(product_id, per_page=_per_page())
+    return _respond('rating', page.items, page)
+
+
+@bp.route('/shops')
+def shops():
+    page = catalog.list_shops(category_id=request.args.get('category_id', type=int),
+                              location=request.args.get('location'),
+                              search_query=request.args.get('q'),
+                              per_page=_per_page())
+    return _respond('shop', page.items, page)
+
+
+@bp.route('/shops/<int:shop_id>')
+def shop(shop_id):
+    shop = Shop.query.get_or_404(shop_id, description='Shop not found.')
+    return _respond('shop', shop, many=False)
+
+
+@bp.route('/shops/<int:shop_id>/products')
+def shop_products(shop_id):
+    Shop.query.get_or_404(shop_id, description='Shop not found.')
+    page = catalog.list_shop_products(shop_id, per_page=_per_page())
+    return _respond('product', page.items, page)
+
+
+@bp.route('/categories')
+def categories():
+    page = catalog.list_categories(shop_id=request.args.get('shop_id', type=int), per_page=_per_page())
+    return _respond('category', page.items, page)
@@ -0,0 +1,132 @@
+# app/assets.py
+import hashlib
+import logging
+import os
+from flask import Response, current_app, g, send_from_directory, url_for
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+ONE_YEAR = 365 * 24 * 60 * 60
+
+# Only first-party CSS/JS is fingerprinted; user uploads get their own unique names
+FINGERPRINT_EXTENSIONS = ('.css', '.js')
+SKIP_DIRS = ('uploads',)
+
+
+class AssetManifest:
+    """Maps static paths to content-hashed paths (e.g. js/main.js -> js/main.3f2a9c1d.js).
+
+    Hashed paths are served by the regular `static` endpoint with an immutable one-year
+    Cache-Control header; a new deploy changes the hash and therefore the URL. Optional
+    bundles are concatenated (and minified when rjsmin/rcssmin are installed) in memory
+    at startup and served the same way.
+    """
+
+    def __init__(self, static_folder, bundles=None, minify=False):
+        self.static_folder = static_folder
+        self.hashed = {}        # original path -> hashed path
+        self.originals = {}     # hashed path -> original path
+        self.bundled = {}       # member path -> bundle path
+        self.bundle_content = {}  # hashed bundle path -> bytes
+        self._scan()
+        for name, members in (bundles or {}).items():
+            self._build_bundle(name, members, minify)
+
+    @staticmethod
+    def _hashed_name(path, content):
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(path)
+        return f"{stem}.{digest}{ext}"
+
+    def _scan(self):
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for filename in files:
+                if not filename.endswith(FINGERPRINT_EXTENSIONS):
+                    continue
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, self.static_folder).replace(os.sep, '/')
+                with open(full_path, 'rb') as fh:
+                    hashed = self._hashed_name(path, fh.read())
+                self.hashed[path] = hashed
+                self.originals[hashed] = path
+
+    def _build_bundle(self, name, members, minify):
+        parts = []
+        for member in members:
+            with open(os.path.join(self.static_folder, member), 'rb') as fh:
+                parts.append(fh.read())
+            self.bundled[member] = name
+        content = b'\n;\n'.join(parts) if name.endswith('.js') else b'\n'.join(parts)
+        if minify:
+            content = _minify(name, content)
+        hashed = self._hashed_name(name, content)
+        self.hashed[name] = hashed
+        self.bundle_content[hashed] = content
+
+    def lookup(self, filename):
+        filename = self.bundled.get(filename, filename)
+        return self.hashed.get(filename, filename)
+
+
+def _minify(name, content):
+    try:
+        if name.endswith('.js'):
+            from rjsmin import jsmin
+            return jsmin(content.decode('utf-8')).encode('utf-8')
+        if name.endswith('.css'):
+            from rcssmin import cssmin
+            return cssmin(content.decode('utf-8')).encode('utf-8')
+    except ImportError:
+        logger.info('rjsmin/rcssmin not installed; serving %s unminified', name)
+    return content
+
+
+def init_app(app):
+    app.jinja_env.globals.update(asset_url=asset_url, asset_script=asset_script)
+
+    # Fingerprinting is pointless while static files are being edited under the debugger
+    if not app.config['ASSET_FINGERPRINTING'] or app.debug:
+        app.extensions['assets'] = None
+        return
+
+    bundles = app.config['ASSET_BUNDLES'] if app.config['ASSET_BUNDLING'] else None
+    manifest = AssetManifest(app.static_folder, bundles, minify=app.config['ASSET_MINIFY'])
+    app.extensions['assets'] = manifest
+
+    plain_static = app.view_functions['static']
+
+    def static(filename):
+        if filename in manifest.bundle_content:
+            response = Response(manifest.bundle_content[filename],
+                                mimetype='text/css' if filename.endswith('.css') else 'text/javascript')
+        elif filename in manifest.originals:
+            response = send_from_directory(app.static_folder, manifest.originals[filename])
+        else:
+            return plain_static(filename=filename)
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = ONE_YEAR
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
+
+
+def asset_url(filename, **values):
+    """`url_for('static', filename=...)` that returns the fingerprinted URL when one exists."""
+    manifest = current_app.extensions.get('assets')
+    if manifest is not None:
+        filename = manifest.lookup(filename)
+    return url_for('static', filename=filename, **values)
+
+
+def asset_script(filename):
+    # Several page scripts can map to one bundle; only emit each URL once per request
+    src = asset_url(filename)
+    emitted = g.setdefault('emitted_scripts', set())
+    if src in emitted:
+        return Markup('')
+    emitted.add(src)
+    return Markup('<script src="{}"></script>').format(src)
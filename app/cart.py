@@ -0,0 +1,236 @@
+# app/cart.py
+import secrets
+from datetime import datetime, timedelta
+import click
+from flask import current_app, session
+from flask.cli import with_appcontext
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import CartItem, Product
+
+# The shopping cart lives server-side; the signed session cookie only carries an opaque
+# `cart_id` plus `cart_count` for the navbar badge. Stores hold nothing but product ids
+# and quantities, and changes made through the database store are committed by the
+# calling view together with the rest of its unit of work. Lines of carts left alone for
+# CART_TTL_DAYS are removed by `flask prune-carts`.
+
+
+def _upsert_insert():
+    # Imported here: the postgresql dialect is slow to import and SQLite deployments never use it
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+class DatabaseCartStore:
+    """Cart lines kept in the `cart_item` table (the default backend)."""
+
+    def get(self, cart_id):
+        rows = db.session.query(CartItem.product_id, CartItem.quantity)\
+                         .filter(CartItem.cart_id == cart_id).order_by(CartItem.id).all()
+        return {product_id: quantity for product_id, quantity in rows}
+
+    def add(self, cart_id, product_id, quantity):
+        # Adds up in the database, so a double submit can't trip the unique constraint
+        now = datetime.utcnow()
+        insert = _upsert_insert()
+        if insert is not None:
+            stmt = insert(CartItem).values(cart_id=cart_id, product_id=product_id,
+                                           quantity=quantity, updated_at=now)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=[CartItem.cart_id, CartItem.product_id],
+                set_={'quantity': CartItem.quantity + stmt.excluded.quantity, 'updated_at': now},
+            ))
+            return
+        if not self._increment(cart_id, product_id, quantity):
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(CartItem).values(cart_id=cart_id, product_id=product_id,
+                                                                  quantity=quantity, updated_at=now))
+            except IntegrityError:
+                # The other request inserted the line first
+                self._increment(cart_id, product_id, quantity)
+
+    def _increment(self, cart_id, product_id, quantity):
+        return CartItem.query.filter_by(cart_id=cart_id, product_id=product_id)\
+                             .update({CartItem.quantity: CartItem.quantity + quantity},
+                                     synchronize_session=False) > 0
+
+    def set(self, cart_id, product_id, quantity):
+        CartItem.query.filter_by(cart_id=cart_id, product_id=product_id)\
+                      .update({CartItem.quantity: quantity}, synchronize_session=False)
+
+    def remove(self, cart_id, product_ids):
+        CartItem.query.filter(CartItem.cart_id == cart_id, CartItem.product_id.in_(product_ids))\
+                      .delete(synchronize_session=False)
+
+    def clear(self, cart_id):
+        CartItem.query.filter_by(cart_id=cart_id).delete(synchronize_session=False)
+
+    def prune(self, older_than):
+        """Delete every line of the carts not touched since `older_than`; returns the count."""
+        stale_carts = db.select(CartItem.cart_id).group_by(CartItem.cart_id)\
+                        .having(db.func.max(db.func.coalesce(CartItem.updated_at, datetime.min)) < older_than)
+        return CartItem.query.filter(CartItem.cart_id.in_(stale_carts)).delete(synchronize_session=False)
+
+
+class MemoryCartStore:
+    """Process-local stand-in for tests and single-process development servers."""
+
+    def __init__(self):
+        self._carts = {}
+
+    def get(self, cart_id):
+        return dict(self._carts.get(cart_id, {}))
+
+    def add(self, cart_id, product_id, quantity):
+        cart = self._carts.setdefault(cart_id, {})
+        cart[product_id] = cart.get(product_id, 0) + quantity
+
+    def set(self, cart_id, product_id, quantity):
+        cart = self._carts.get(cart_id, {})
+        if product_id in cart:
+            cart[product_id] = quantity
+
+    def remove(self, cart_id, product_ids):
+        cart = self._carts.get(cart_id, {})
+        for product_id in product_ids:
+            cart.pop(product_id, None)
+
+    def clear(self, cart_id):
+        self._carts.pop(cart_id, None)
+
+    def prune(self, older_than):
+        # Lives and dies with the process
+        return 0
+
+
+CART_BACKENDS = {
+    'database': DatabaseCartStore,
+    'memory': MemoryCartStore,
+}
+
+
+def init_app(app):
+    app.extensions['cart_store'] = CART_BACKENDS[app.config['CART_BACKEND']]()
+
+
+class CartLine:
+    """A cart entry hydrated with its (already loaded) product."""
+
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+
+    @property
+    def id(self):
+        return self.product.id
+
+    @property
+    def name(self):
+        return self.product.name
+
+    @property
+    def image(self):
+        return self.product.image
+
+    @property
+    def price(self):
+        return float(self.product.price or 0)
+
+    @property
+    def subtotal(self):
+        return self.quantity * self.price
+
+
+def _store():
+    return current_app.extensions['cart_store']
+
+
+def _cart_id(create=False):
+    cart_id = session.get('cart_id')
+    if cart_id is None and create:
+        cart_id = session['cart_id'] = secrets.token_urlsafe(24)
+        # Drop the cookie-based cart from before carts moved server-side
+        session.pop('cart', None)
+    return cart_id
+
+
+def _sync_count(cart_id):
+    session['cart_count'] = len(_store().get(cart_id))
+
+
+def quantities():
+    """Return {product_id: quantity} for the current session's cart."""
+    cart_id = _cart_id()
+    return _store().get(cart_id) if cart_id else {}
+
+
+def add_item(product_id, quantity):
+    cart_id = _cart_id(create=True)
+    _store().add(cart_id, product_id, quantity)
+    _sync_count(cart_id)
+
+
+def set_quantity(product_id, quantity):
+    cart_id = _cart_id(create=True)
+    _store().set(cart_id, product_id, quantity)
+
+
+def remove_items(product_ids):
+    cart_id = _cart_id()
+    if cart_id and product_ids:
+        _store().remove(cart_id, list(product_ids))
+        _sync_count(cart_id)
+
+
+def clear():
+    cart_id = _cart_id()
+    if cart_id:
+        _store().clear(cart_id)
+    session.pop('cart_count', None)
+
+
+def load():
+    """Hydrate the cart with one IN query (shops eagerly loaded).
+
+    Returns (lines, unavailable) where `lines` are CartLine objects for active products
+    and `unavailable` lists the names of products that were deactivated or deleted.
+    Unavailable lines are removed from the store.
+    """
+    cart = quantities()
+    if not cart:
+        return [], []
+
+    products = Product.query.options(joinedload(Product.shop))\
+                            .filter(Product.id.in_(list(cart))).all()
+    products_by_id = {product.id: product for product in products}
+
+    lines, unavailable, stale_ids = [], [], []
+    for product_id, quantity in cart.items():
+        product = products_by_id.get(product_id)
+        if product and product.is_active:
+            lines.append(CartLine(product, quantity))
+        else:
+            stale_ids.append(product_id)
+            unavailable.append(product.name if product else f'#{product_id}')
+
+    remove_items(stale_ids)
+    return lines, unavailable
+
+
+@click.command('prune-carts')
+@click.option('--days', type=int, help='Age of the carts to remove (default: CART_TTL_DAYS).')
+@with_appcontext
+def prune_carts_command(days):
+    """Delete carts that haven't changed for a while (anonymous and abandoned ones)."""
+    days = days if days is not None else current_app.config['CART_TTL_DAYS']
+    removed = _store().prune(datetime.utcnow() - timedelta(days=days))
+    db.session.commit()
+    click.echo(f'Removed {removed:,} cart lines untouched for {days} days.')
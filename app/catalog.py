@@ -0,0 +1,134 @@
+# app/catalog.py
+from itertools import groupby
+from sqlalchemy import or_
+from sqlalchemy.orm import contains_eager, joinedload
+from app import db, search as catalog_search
+from app.models import Shop, Product, Category, Rating
+from app.pagination import keyset_paginate
+
+# Storefront queries shared by the HTML views (app/customer.py) and the JSON API
+# (app/api.py), so both clients hit the same indexes with the same statements.
+
+PRODUCT_SORTS = ('relevance', 'newest', 'price_asc', 'price_desc', 'rating_desc')
+
+
+def featured_products(limit=8):
+    """The newest active products for the home page, with their shops."""
+    return Product.query.options(joinedload(Product.shop)).filter_by(is_active=True)\
+                        .order_by(Product.created_at.desc()).limit(limit).all()
+
+
+def search_products(search_query='', min_price=None, max_price=None, category_id=None,
+                    sort_by=None, per_page=None):
+    """One keyset page of active products matching the storefront search filters."""
+    sort_by = sort_by or ('relevance' if search_query else 'newest')
+    # Shops come along: the product card's fragment cache key reads product.shop
+    products_query = Product.query.options(joinedload(Product.shop)).filter_by(is_active=True)
+    product_rank = None
+
+    if search_query:
+        products_query, product_rank = catalog_search.filter_products(products_query, search_query)
+
+    if min_price is not None:
+        products_query = products_query.filter(Product.price >= min_price)
+
+    if max_price is not None:
+        products_query = products_query.filter(Product.price <= max_price)
+
+    if category_id:
+        products_query = products_query.filter(Product.category_id == category_id)
+
+    # Each sort order is a (key, id) cursor, so deep pages don't skip rows with an OFFSET
+    if sort_by == 'price_asc':
+        return keyset_paginate(products_query, [Product.price, Product.id], descending=False, per_page=per_page)
+    elif sort_by == 'price_desc':
+        return keyset_paginate(products_query, [Product.price, Product.id], per_page=per_page)
+    elif sort_by == 'rating_desc':
+        return keyset_paginate(products_query, [Product.rating_avg, Product.id], per_page=per_page)
+    elif sort_by == 'relevance' and product_rank is not None:
+        return keyset_paginate(products_query, [product_rank, Product.id], descending=False, per_page=per_page)
+    else: # 'newest'
+        return keyset_paginate(products_query, [Product.created_at, Product.id], per_page=per_page)
+
+
+def top_shops(search_query='', limit=8):
+    """The best few shops for a search, or the newest ones without a query."""
+    shops_query = Shop.query
+    shop_rank = None
+    if search_query:
+        shops_query, shop_rank = catalog_search.filter_shops(shops_query, search_query)
+    if shop_rank is not None:
+        shops_query = shops_query.order_by(shop_rank)
+    else:
+        shops_query = shops_query.order_by(Shop.created_at.desc())
+    return shops_query.limit(limit).all()
+
+
+def list_shops(category_id=None, location=None, search_query=None, per_page=None):
+    """One keyset page of shops, optionally limited to a category, location or search."""
+    shops_query = Shop.query
+
+    if category_id:
+        shops_query = shops_query.filter(Shop.id.in_(
+            db.select(Product.shop_id).filter(Product.category_id == category_id, Product.is_active==True)
+        ))
+
+    if location:
+        shops_query = shops_query.filter(Shop.location.ilike(f'%{location}%'))
+
+    shop_rank = None
+    if search_query:
+        shops_query, shop_rank = catalog_search.filter_shops(shops_query, search_query)
+
+    if shop_rank is not None:
+        return keyset_paginate(shops_query, [shop_rank, Shop.id], descending=False, per_page=per_page)
+    return keyset_paginate(shops_query, [Shop.created_at, Shop.id], per_page=per_page)
+
+
+def shop_products(shop_id):
+    """Every active product of a shop with its category loaded, grouped by category.
+
+    One ordered query; uncategorized products sort last so they form the final group.
+    Returns a list of (category or None, [products]) pairs.
+    """
+    products = Product.query.filter_by(shop_id=shop_id, is_active=True)\
+                            .outerjoin(Product.category)\
+                            .options(contains_eager(Product.category))\
+                            .order_by(Category.id.is_(None), Category.id, Product.id)\
+                            .all()
+    return [(category, list(group)) for category, group in groupby(products, key=lambda product: product.category)]
+
+
+def list_shop_products(shop_id, per_page=None):
+    """One keyset page of a shop's active products in id order."""
+    return keyset_paginate(Product.query.filter_by(shop_id=shop_id, is_active=True),
+                           [Product.id], descending=False, per_page=per_page)
+
+
+def categories_by_shop(shop_ids):
+    """{shop id: [(category id, name), ...]} with each shop's own categories followed by
+    the global ones (shop_id NULL), which every shop can use. One query for all shops."""
+    shop_ids = list(shop_ids)
+    rows = db.session.query(Category.id, Category.name, Category.shop_id)\
+                     .filter(or_(Category.shop_id.in_(shop_ids), Category.shop_id.is_(None)))\
+                     .order_by(Category.shop_id.is_(None), Category.name, Category.id).all()
+    global_choices = [(id_, name) for id_, name, shop_id in rows if shop_id is None]
+    choices = {shop_id: [] for shop_id in shop_ids}
+    for id_, name, shop_id in rows:
+        if shop_id is not None:
+            choices[shop_id].append((id_, name))
+    return {shop_id: own + global_choices for shop_id, own in choices.items()}
+
+
+def list_categories(shop_id=None, per_page=None):
+    """One keyset page of categories in id order, optionally those of a single shop."""
+    query = Category.query
+    if shop_id is not None:
+        query = query.filter_by(shop_id=shop_id)
+    return keyset_paginate(query, [Category.id], descending=False, per_page=per_page)
+
+
+def product_ratings(product_id, per_page=None):
+    """One keyset page of a product's ratings, newest first."""
+    return keyset_paginate(Rating.query.filter_by(product_id=product_id),
+                           [Rating.created_at, Rating.id], per_page=per_page)
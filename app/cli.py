@@ -0,0 +1,90 @@
+# app/cli.py
+import os
+import click
+from flask import current_app, g
+from flask.cli import with_appcontext
+from sqlalchemy import inspect
+from app import db
+
+# One-off setup lives in CLI commands rather than create_app(), so booting a web worker
+# never touches the schema or hashes a password. Run `flask bootstrap` once per deploy,
+# before the workers start.
+
+
+def _init_migrate():
+    from flask_migrate import Migrate
+    if 'migrate' not in current_app.extensions:
+        # Next to the app package, so commands work from any working directory
+        Migrate(current_app, db, directory=os.path.join(os.path.dirname(current_app.root_path), 'migrations'))
+
+
+class LazyMigrateGroup(click.Group):
+    """`flask db` group that loads Flask-Migrate's subcommands on first use.
+
+    Flask-Migrate pulls in alembic, which is a large share of the app's import time and
+    is never needed by a web worker.
+    """
+
+    def _group(self):
+        _init_migrate()
+        from flask_migrate.cli import db as db_group
+        return db_group
+
+    def list_commands(self, ctx):
+        return self._group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._group().get_command(ctx, name)
+
+
+# Same options as Flask-Migrate's own group, which stores them on g for its commands
+@click.group('db', cls=LazyMigrateGroup)
+@click.option('-d', '--directory', default=None,
+              help='Migration script directory (default is "migrations")')
+@click.option('-x', '--x-arg', multiple=True,
+              help='Additional arguments consumed by custom env.py scripts')
+@with_appcontext
+def migrate_group(directory, x_arg):
+    """Perform database migrations."""
+    g.directory = directory
+    g.x_arg = x_arg
+
+
+@click.command('bootstrap')
+@click.option('--skip-admin', is_flag=True, help="Don't create the default admin account.")
+@with_appcontext
+def bootstrap_command(skip_admin):
+    """Create missing tables, the search index and the default admin account."""
+    from app import search
+    from app.models import User
+
+    fresh = not inspect(db.engine).get_table_names()
+    db.create_all()
+    search.create_index()
+    if fresh:
+        # The tables match the latest migration; record that so `flask db upgrade` works from here
+        _init_migrate()
+        from flask_migrate import stamp
+        stamp()
+        click.echo('Created the database schema at the latest migration.')
+    else:
+        click.echo('Database schema present; run `flask db upgrade` to apply pending migrations.')
+
+    if not skip_admin:
+        User.create_default_admin(
+            username=current_app.config['ADMIN_USERNAME'],
+            email=current_app.config['ADMIN_EMAIL'],
+            password=current_app.config['ADMIN_PASSWORD']
+        )
+        click.echo(f"Default admin account '{current_app.config['ADMIN_USERNAME']}' is present.")
+
+
+def init_app(app):
+    from app.seed import seed_command
+    from app.product_import import import_products_command
+    from app.cart import prune_carts_command
+    app.cli.add_command(migrate_group)
+    app.cli.add_command(bootstrap_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(import_products_command)
+    app.cli.add_command(prune_carts_command)
@@ -1,17 +1,23 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from app.models import Shop, Product, Category, Rating, Order, OrderItem, Notification
 from app.forms import RatingForm, ProfileForm, ChangePasswordForm
-from app import db
+from app import db, cart, catalog
+from app.page_cache import cached
+from app.orders import place_order
 from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
 
 bp = Blueprint('customer', __name__)
 
+SEARCH_SHOP_LIMIT = 8
+
 @bp.route('/')
+@cached
 def index():
     categories = Category.query.all()
     featured_shops = Shop.query.order_by(Shop.created_at.desc()).limit(8).all()
-    featured_products = Product.query.filter_by(is_active=True).order_by(Product.created_at.desc()).limit(8).all()
+    featured_products = catalog.featured_products()
     return render_template('customer/index.html',
                          categories=categories,
                          featured_shops=featured_shops,
@@ -39,51 +45,34 @@ def customer_dashboard(): # Renamed from 'dashboard' to 'customer_dashboard' for
 
 
 @bp.route('/shops')
+@cached
 def shop_list():
-    category_id = request.args.get('category_id')
-    location = request.args.get('location')
-    query = request.args.get('q')
-
-    shops_query = Shop.query
-
-    if category_id:
-        shops_query = shops_query.join(Product).filter(Product.category_id == category_id, Product.is_active==True)
-
-    if location:
-        shops_query = shops_query.filter(Shop.location.ilike(f'%{location}%'))
-
-    if query:
-        shops_query = shops_query.filter(Shop.name.ilike(f'%{query}%'))
-
-    shops = shops_query.distinct().all()
+    shops = catalog.list_shops(category_id=request.args.get('category_id'),
+                               location=request.args.get('location'),
+                               search_query=request.args.get('q'))
     categories = Category.query.all()
-    return render_template('customer/shop_list.html', shops=shops, categories=categories)
+    return render_template('customer/shop_list.html', shops=shops.items, pagination=shops, categories=categories)
 
 @bp.route('/shops/<int:shop_id>')
+@cached
 def shop_detail(shop_id):
     shop = Shop.query.get_or_404(shop_id)
 
-    categories = Category.query.filter_by(shop_id=shop.id).all()
-
+    # Keyed by (id, name): a shop category and a global one can share a name
     products_by_category = {}
-    for category in categories:
-        products = Product.query.filter_by(shop_id=shop.id, category_id=category.id, is_active=True).all()
-        if products:
-            products_by_category[category.name] = products
-
-    uncategorized = Product.query.filter_by(shop_id=shop.id, category_id=None, is_active=True).all()
-    if uncategorized:
-        products_by_category['Uncategorized'] = uncategorized
-
-    avg_rating = shop.average_rating()
-    rating_count = shop.ratings.count()
+    products_count = 0
+    for category, products in catalog.shop_products(shop.id):
+        key = (category.id, category.name) if category else (None, 'Uncategorized')
+        products_by_category[key] = products
+        products_count += len(products)
 
+    # Rating stats come from the aggregates stored on the shop row
     return render_template('customer/shop_detail.html',
                          shop=shop,
                          products_by_category=products_by_category,
-                         products_count=Product.query.filter_by(shop_id=shop.id, is_active=True).count(),
-                         avg_rating=avg_rating,
-                         rating_count=rating_count)
+                         products_count=products_count,
+                         avg_rating=shop.average_rating(),
+                         rating_count=shop.rating_count)
 
 @bp.route('/product/<int:product_id>/rate', methods=['POST'])
 @login_required
@@ -106,8 +95,11 @@ def rate_product(product_id):
     ).first()
 
     if existing_rating:
+        value_delta = rating_value - existing_rating.value
         existing_rating.value = rating_value
         existing_rating.comment = comment_text if comment_text else None
+        product.apply_rating_delta(value_delta)
+        product.shop.apply_rating_delta(value_delta)
     else:
         rating = Rating(
             value=rating_value,
@@ -117,8 +109,16 @@ def rate_product(product_id):
             shop_id=product.shop_id
         )
         db.session.add(rating)
+        product.apply_rating_delta(rating_value, 1)
+        product.shop.apply_rating_delta(rating_value, 1)
 
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent submit inserted this user's rating first (unique product/user index)
+        db.session.rollback()
+        flash('Your rating for this product was already recorded.', 'info')
+        return redirect(url_for('customer.product_detail', product_id=product_id))
     flash('Thank you for rating this product!', 'success')
     return redirect(url_for('customer.product_detail', product_id=product_id))
 
@@ -130,7 +130,7 @@ def product_detail(product_id):
         return redirect(url_for('customer.index'))
 
     avg_rating = product.average_rating()
-    rating_count = product.ratings.count()
+    rating_count = product.rating_count
     form = RatingForm()
     return render_template('customer/product_detail.html',
                          product=product,
@@ -145,41 +145,18 @@ def search():
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
     category_id = request.args.get('category_id', type=int)
-    sort_by = request.args.get('sort_by', 'newest')
-
-    products_query = Product.query.filter_by(is_active=True)
-    shops_query = Shop.query
-
-    if search_query:
-        products_query = products_query.filter(Product.name.ilike(f'%{search_query}%'))
-        shops_query = shops_query.filter(Shop.name.ilike(f'%{search_query}%'))
-
-    if min_price is not None:
-        products_query = products_query.filter(Product.price >= min_price)
+    sort_by = request.args.get('sort_by', 'relevance' if search_query else 'newest')
 
-    if max_price is not None:
-        products_query = products_query.filter(Product.price <= max_price)
-
-    if category_id:
-        products_query = products_query.filter(Product.category_id == category_id)
-
-    if sort_by == 'price_asc':
-        products_query = products_query.order_by(Product.price.asc())
-    elif sort_by == 'price_desc':
-        products_query = products_query.order_by(Product.price.desc())
-    elif sort_by == 'rating_desc':
-        products_query = products_query.order_by(Product.created_at.desc())
-    else: # 'newest'
-        products_query = products_query.order_by(Product.created_at.desc())
-
-    products = products_query.all()
-    shops = shops_query.all()
+    products = catalog.search_products(search_query, min_price, max_price, category_id, sort_by)
+    # Matching shops are a secondary section, so only the best few are shown
+    shops = catalog.top_shops(search_query, SEARCH_SHOP_LIMIT)
 
     all_categories = Category.query.all()
 
     return render_template('customer/search_results.html',
                          query=search_query,
-                         products=products,
+                         products=products.items,
+                         pagination=products,
                          shops=shops,
                          categories=all_categories,
                          min_price=min_price,
@@ -202,54 +179,26 @@ def add_to_cart(product_id):
         flash('Quantity must be at least 1.', 'danger')
         return redirect(url_for('customer.product_detail', product_id=product_id))
 
-    if 'cart' not in session:
-        session['cart'] = {}
-
-    product_id_str = str(product.id)
-
-    if product_id_str in session['cart']:
-        session['cart'][product_id_str]['quantity'] += quantity
-    else:
-        session['cart'][product_id_str] = {
-            'name': product.name,
-            'price': float(product.price),
-            'quantity': quantity,
-            'image': product.image
-        }
-    session.modified = True
+    cart.add_item(product.id, quantity)
+    db.session.commit()
 
     flash(f'{quantity} x {product.name} added to cart!', 'success')
     return redirect(url_for('customer.view_cart'))
 
 @bp.route('/cart')
 def view_cart():
-    cart = session.get('cart', {})
-    cart_items = []
-    total_price = 0
-
-    products_to_remove = []
-    for product_id_str, item_data in cart.items():
-        product = Product.query.get(int(product_id_str))
-        if product and product.is_active:
-            item_data['id'] = product.id
-            item_data['subtotal'] = item_data['quantity'] * item_data['price']
-            cart_items.append(item_data)
-            total_price += item_data['subtotal']
-        else:
-            products_to_remove.append(product_id_str)
+    cart_items, unavailable = cart.load()
 
-    for product_id_str in products_to_remove:
-        product_name = cart[product_id_str]['name']
-        del session['cart'][product_id_str]
+    for product_name in unavailable:
         flash(f"Product '{product_name}' is no longer available and has been removed from your cart.", "warning")
-    
-    if products_to_remove:
-        session.modified = True
-        if not session.get('cart'):
+
+    if unavailable:
+        db.session.commit()
+        if not cart_items:
             flash("Your cart is now empty as some items became unavailable.", "warning")
             return redirect(url_for('customer.index'))
 
-
+    total_price = sum(item.subtotal for item in cart_items)
     return render_template('customer/cart.html', cart_items=cart_items, total_price=total_price)
 
 @bp.route('/update_cart/<int:product_id>', methods=['POST'])
@@ -260,16 +209,15 @@ def update_cart(product_id):
         return redirect(url_for('customer.view_cart'))
 
     quantity = request.form.get('quantity', type=int)
-    product_id_str = str(product_id)
 
-    if 'cart' in session and product_id_str in session['cart']:
+    if product_id in cart.quantities():
         if quantity is not None and quantity > 0:
-            session['cart'][product_id_str]['quantity'] = quantity
-            flash(f'Quantity for {session["cart"][product_id_str]["name"]} updated to {quantity}.', 'info')
+            cart.set_quantity(product_id, quantity)
+            flash(f'Quantity for {product.name} updated to {quantity}.', 'info')
         else:
-            del session['cart'][product_id_str]
+            cart.remove_items([product_id])
             flash(f'Item removed from cart.', 'info')
-        session.modified = True
+        db.session.commit()
     else:
         flash('Item not found in cart.', 'danger')
 
@@ -277,12 +225,11 @@ def update_cart(product_id):
 
 @bp.route('/remove_from_cart/<int:product_id>', methods=['POST'])
 def remove_from_cart(product_id):
-    product_id_str = str(product_id)
-    if 'cart' in session and product_id_str in session['cart']:
-        product_name = session['cart'][product_id_str]['name']
-        del session['cart'][product_id_str]
-        session.modified = True
-        flash(f'{product_name} removed from cart.', 'info')
+    if product_id in cart.quantities():
+        product = db.session.get(Product, product_id)
+        cart.remove_items([product_id])
+        db.session.commit()
+        flash(f'{product.name if product else "Item"} removed from cart.', 'info')
     else:
         flash('Item not found in cart.', 'danger')
     return redirect(url_for('customer.view_cart'))
@@ -290,102 +237,43 @@ def remove_from_cart(product_id):
 @bp.route('/checkout')
 @login_required
 def checkout():
-    cart = session.get('cart', {})
-    if not cart:
+    cart_items, unavailable = cart.load()
+    if not cart_items and not unavailable:
         flash('Your cart is empty. Please add items before checking out.', 'warning')
         return redirect(url_for('customer.index'))
 
-    cart_items = []
-    total_price = 0
-    products_to_remove = []
-    for product_id_str, item_data in cart.items():
-        product = Product.query.get(int(product_id_str))
-        if product and product.is_active:
-            item_data['id'] = product.id
-            item_data['subtotal'] = item_data['quantity'] * item_data['price']
-            cart_items.append(item_data)
-            total_price += item_data['subtotal']
-        else:
-            products_to_remove.append(product_id_str)
-
-    for product_id_str in products_to_remove:
-        product_name = cart[product_id_str]['name']
-        del session['cart'][product_id_str]
+    for product_name in unavailable:
         flash(f"Product '{product_name}' is no longer available and was removed from your cart during checkout.", "warning")
-    
-    if products_to_remove:
-        session.modified = True
-        if not session.get('cart'):
+
+    if unavailable:
+        db.session.commit()
+        if not cart_items:
             flash("Your cart is now empty as some items became unavailable.", "warning")
             return redirect(url_for('customer.index'))
 
-
+    total_price = sum(item.subtotal for item in cart_items)
     return render_template('customer/checkout.html', cart_items=cart_items, total_price=total_price)
 
 @bp.route('/confirm_order', methods=['POST'])
 @login_required
 def confirm_order():
-    cart = session.get('cart', {})
-    if not cart:
+    cart_items, unavailable = cart.load()
+    if not cart_items and not unavailable:
         flash('Your cart is empty. Cannot confirm an empty order.', 'warning')
         return redirect(url_for('customer.index'))
 
-    valid_cart_items = {}
-    products_removed_during_confirm = []
-    marketer_ids_to_notify = set()
-
-    for product_id_str, item_data in cart.items():
-        product = Product.query.get(int(product_id_str))
-        if product and product.is_active:
-            valid_cart_items[product_id_str] = item_data
-            marketer_ids_to_notify.add(product.shop.owner.id)
-        else:
-            products_removed_during_confirm.append(item_data['name'])
-
-    if products_removed_during_confirm:
-        flash(f"Some products were removed from your order as they became unavailable: {', '.join(products_removed_during_confirm)}", 'danger')
-        session['cart'] = valid_cart_items
-        session.modified = True
-        if not valid_cart_items:
+    if unavailable:
+        db.session.commit()
+        flash(f"Some products were removed from your order as they became unavailable: {', '.join(unavailable)}", 'danger')
+        if not cart_items:
             flash('Your cart is now empty. Please add items before checking out.', 'warning')
             return redirect(url_for('customer.index'))
         return redirect(url_for('customer.checkout'))
 
-
-    total_price = sum(item['quantity'] * item['price'] for item in valid_cart_items.values())
-
-    new_order = Order(
-        user_id=current_user.id,
-        total_price=total_price,
-        status='Pending'
-    )
-    db.session.add(new_order)
-    db.session.flush()
-
-    for product_id_str, item_data in valid_cart_items.items():
-        product = Product.query.get(int(product_id_str))
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=product.id,
-            shop_id=product.shop_id,
-            quantity=item_data['quantity'],
-            price_at_purchase=item_data['price']
-        )
-        db.session.add(order_item)
-
-    for marketer_id in marketer_ids_to_notify:
-        notification_message = f"New order #{new_order.id} placed by {current_user.username} containing your products."
-        notification = Notification(
-            user_id=marketer_id,
-            message=notification_message,
-            order_id=new_order.id
-        )
-        db.session.add(notification)
-
+    place_order(current_user, cart_items)
+    cart.clear()
     db.session.commit()
 
-    session.pop('cart', None)
-    session.modified = True
     flash('Your order has been placed successfully! Marketers will be in touch.', 'success')
     return redirect(url_for('customer.index'))
 
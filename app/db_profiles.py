@@ -0,0 +1,74 @@
+# app/db_profiles.py
+from sqlalchemy import event
+
+# Engine tuning chosen by DATABASE_PROFILE ('sqlite', 'postgresql' or 'default'). When
+# unset, the profile follows the scheme of SQLALCHEMY_DATABASE_URI. Options already set in
+# SQLALCHEMY_ENGINE_OPTIONS win over the profile's defaults.
+
+
+def detect_profile(app):
+    profile = app.config.get('DATABASE_PROFILE')
+    if profile:
+        return profile
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        return 'sqlite'
+    if uri.startswith(('postgresql', 'postgres')):
+        return 'postgresql'
+    return 'default'
+
+
+def configure_engine_options(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS for the active profile; call before db.init_app()."""
+    profile = detect_profile(app)
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+    if profile == 'postgresql':
+        options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+        options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+        options.setdefault('pool_pre_ping', True)
+        connect_args = dict(options.get('connect_args') or {})
+        # Server-side limits so a runaway query or an abandoned transaction can't pin a worker
+        connect_args.setdefault('options', (
+            f"-c statement_timeout={app.config['DB_STATEMENT_TIMEOUT_MS']} "
+            f"-c idle_in_transaction_session_timeout={app.config['DB_IDLE_IN_TRANSACTION_TIMEOUT_MS']}"
+        ))
+        options['connect_args'] = connect_args
+    elif profile == 'sqlite':
+        connect_args = dict(options.get('connect_args') or {})
+        # Seconds the sqlite3 driver itself waits on a locked database
+        connect_args.setdefault('timeout', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+        options['connect_args'] = connect_args
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return profile
+
+
+def sqlite_pragmas(app):
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'],
+        'cache_size': -app.config['SQLITE_CACHE_SIZE_KB'],  # negative means KiB
+        'mmap_size': app.config['SQLITE_MMAP_SIZE'],
+        'temp_store': 'MEMORY',
+    }
+
+
+def init_app(app, db):
+    """Attach per-connection setup for the active profile; call after db.init_app()."""
+    if detect_profile(app) != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(app)
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,227 @@
+# app/exports.py
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, timedelta
+from flask import Response, current_app, request, stream_with_context
+from app import db
+from app.models import User, Shop, Category, Product, Order, OrderItem
+
+# CSV and JSON Lines exports of the catalog and sales tables for admins, and for marketers
+# scoped to their own shops. Rows are selected as plain column tuples (no ORM objects) and
+# fetched EXPORT_YIELD_PER at a time through a server-side cursor, encoded into ~64 KB
+# chunks and, when the client accepts it, gzip-compressed chunk by chunk, so memory stays
+# flat however many rows are exported.
+#
+# Query parameters: dataset, format, shop_id, date_from / date_to (YYYY-MM-DD, inclusive,
+# on created_at; order items use their order's), status (products: active / inactive;
+# orders and order items: the order status).
+
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+CHUNK_SIZE = 64 * 1024
+
+# dataset -> (column label, SQL expression) pairs
+COLUMNS = {
+    'products': [
+        ('id', Product.id), ('name', Product.name), ('description', Product.description),
+        ('price', Product.price), ('is_active', Product.is_active), ('shop_id', Product.shop_id),
+        ('shop', Shop.name), ('category_id', Product.category_id), ('category', Category.name),
+        ('rating_avg', Product.rating_avg), ('rating_count', Product.rating_count),
+        ('created_at', Product.created_at),
+    ],
+    'shops': [
+        ('id', Shop.id), ('name', Shop.name), ('description', Shop.description),
+        ('location', Shop.location), ('whatsapp_number', Shop.whatsapp_number),
+        ('owner_id', Shop.user_id), ('owner', User.username), ('rating_avg', Shop.rating_avg),
+        ('rating_count', Shop.rating_count), ('created_at', Shop.created_at),
+    ],
+    'orders': [
+        ('id', Order.id), ('customer_id', Order.user_id), ('customer', User.username),
+        ('status', Order.status), ('total_price', Order.total_price),
+        ('created_at', Order.created_at), ('updated_at', Order.updated_at),
+    ],
+    'order_items': [
+        ('id', OrderItem.id), ('order_id', OrderItem.order_id), ('order_status', Order.status),
+        ('order_created_at', Order.created_at), ('product_id', OrderItem.product_id),
+        ('product', Product.name), ('shop_id', OrderItem.shop_id), ('quantity', OrderItem.quantity),
+        ('price_at_purchase', OrderItem.price_at_purchase),
+        ('subtotal', OrderItem.quantity * OrderItem.price_at_purchase),
+    ],
+}
+DATASETS = tuple(COLUMNS)
+
+# Owner-scoped overrides: a marketer's order rows total only their own shops' lines and
+# carry no more about the customer than the marketer order pages show
+OWNER_COLUMNS = {
+    'orders': [
+        ('id', Order.id), ('customer', User.username), ('status', Order.status),
+        ('subtotal', db.func.sum(OrderItem.quantity * OrderItem.price_at_purchase)),
+        ('created_at', Order.created_at), ('updated_at', Order.updated_at),
+    ],
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _date(args, name):
+    value = args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ExportError(f'{name} must be a date like 2026-01-31.')
+
+
+def parse_filters(args):
+    """The export filters in request `args`; raises ExportError when one is malformed."""
+    shop_id = args.get('shop_id', '').strip()
+    if shop_id and not shop_id.isdigit():
+        raise ExportError('shop_id must be a shop number.')
+    return {
+        'shop_id': int(shop_id) if shop_id else None,
+        'date_from': _date(args, 'date_from'),
+        'date_to': _date(args, 'date_to'),
+        'status': args.get('status', '').strip() or None,
+    }
+
+
+def build_query(dataset, shop_id=None, date_from=None, date_to=None, status=None, owner_id=None):
+    """(column labels, SELECT) for a dataset; `owner_id` limits it to that marketer's shops."""
+    columns = OWNER_COLUMNS.get(dataset, COLUMNS[dataset]) if owner_id is not None else COLUMNS[dataset]
+    labels = [label for label, _ in columns]
+    stmt = db.select(*[column.label(label) for label, column in columns])
+    owned_shops = db.select(Shop.id).where(Shop.user_id == owner_id)
+
+    if dataset == 'products':
+        stmt = stmt.select_from(Product).join(Shop, Shop.id == Product.shop_id)\
+                   .outerjoin(Category, Category.id == Product.category_id)
+        created_at, shop_column = Product.created_at, Product.shop_id
+        if status is not None:
+            if status not in ('active', 'inactive'):
+                raise ExportError("Product status must be 'active' or 'inactive'.")
+            stmt = stmt.where(Product.is_active == (status == 'active'))
+        if owner_id is not None:
+            stmt = stmt.where(Shop.user_id == owner_id)
+    elif dataset == 'shops':
+        stmt = stmt.select_from(Shop).outerjoin(User, User.id == Shop.user_id)
+        created_at, shop_column = Shop.created_at, Shop.id
+        if status is not None:
+            raise ExportError('Shops cannot be filtered by status.')
+        if owner_id is not None:
+            stmt = stmt.where(Shop.user_id == owner_id)
+    elif dataset == 'orders' and owner_id is not None:
+        # One row per order, summing just this marketer's lines (of one shop with shop_id)
+        stmt = stmt.select_from(Order).join(OrderItem, OrderItem.order_id == Order.id)\
+                   .outerjoin(User, User.id == Order.user_id)\
+                   .where(OrderItem.shop_id.in_(owned_shops)).group_by(Order.id, User.username)
+        created_at, shop_column = Order.created_at, OrderItem.shop_id
+    elif dataset == 'orders':
+        stmt = stmt.select_from(Order).outerjoin(User, User.id == Order.user_id)
+        created_at, shop_column = Order.created_at, None
+        if shop_id is not None:
+            stmt = stmt.where(Order.id.in_(db.select(OrderItem.order_id).where(OrderItem.shop_id == shop_id)))
+    else: # 'order_items'
+        stmt = stmt.select_from(OrderItem).join(Order, Order.id == OrderItem.order_id)\
+                   .outerjoin(Product, Product.id == OrderItem.product_id)
+        created_at, shop_column = Order.created_at, OrderItem.shop_id
+        if owner_id is not None:
+            stmt = stmt.where(OrderItem.shop_id.in_(owned_shops))
+
+    if dataset in ('orders', 'order_items') and status is not None:
+        stmt = stmt.where(Order.status == status)
+    if shop_id is not None and shop_column is not None:
+        stmt = stmt.where(shop_column == shop_id)
+    if date_from is not None:
+        stmt = stmt.where(created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to is not None:
+        stmt = stmt.where(created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+
+    # Primary key order: a stable export that walks the table's own index
+    return labels, stmt.order_by(columns[0][1])
+
+
+def iter_rows(stmt):
+    """Rows of `stmt`, fetched EXPORT_YIELD_PER at a time from a server-side cursor."""
+    result = db.session.execute(stmt.execution_options(yield_per=current_app.config['EXPORT_YIELD_PER']))
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def encode_csv(labels, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(labels)
+    for row in rows:
+        writer.writerow([_value(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_jsonl(labels, rows):
+    lines, size = [], 0
+    for row in rows:
+        line = json.dumps({label: _value(value) for label, value in zip(labels, row)},
+                          separators=(',', ':'), ensure_ascii=False)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines, size = [], 0
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+ENCODERS = {'csv': encode_csv, 'jsonl': encode_jsonl}
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of byte chunks incrementally (one gzip member for the whole body)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(args, owner_id=None):
+    """A streamed download for the export described by request `args`.
+
+    Raises ExportError for an unknown dataset or format or a malformed filter, before
+    anything is sent.
+    """
+    dataset = args.get('dataset', 'products')
+    fmt = args.get('format', 'csv')
+    if dataset not in COLUMNS:
+        raise ExportError(f"Unknown export '{dataset}'. Choose one of: {', '.join(DATASETS)}.")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format '{fmt}'. Choose csv or jsonl.")
+    labels, stmt = build_query(dataset, owner_id=owner_id, **parse_filters(args))
+
+    body = (chunk.encode() for chunk in ENCODERS[fmt](labels, iter_rows(stmt)))
+    compress = request.accept_encodings['gzip'] > 0
+    if compress:
+        body = gzip_chunks(body, current_app.config['EXPORT_GZIP_LEVEL'])
+
+    response = Response(stream_with_context(body), mimetype=FORMATS[fmt])
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Cache-Control'] = 'private, no-store'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['X-Accel-Buffering'] = 'no'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -12,8 +12,9 @@ from wtforms import (
     SelectMultipleField
 )
 from wtforms.validators import DataRequired, Email, EqualTo, Length, NumberRange, Optional, ValidationError
-from flask_wtf.file import FileAllowed
-from app.models import Category, User
+from flask_wtf.file import FileAllowed, FileRequired
+from app.models import User
+from app.catalog import categories_by_shop
 
 class LoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
@@ -92,8 +93,19 @@ class ProductForm(FlaskForm):
         self.category_id.choices = []
 
     def update_categories(self, shop_id):
-        self.category_id.choices = [(c.id, c.name) for c in
-                                  Category.query.filter_by(shop_id=shop_id).all()]
+        # Same choices as the marketer category endpoint: the shop's own plus global ones
+        self.category_id.choices = categories_by_shop([shop_id])[shop_id]
+
+class ProductImportForm(FlaskForm):
+    shop_id = SelectField('Shop', coerce=int, validators=[DataRequired()])
+    file = FileField('Products File (CSV or JSON Lines)', validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'jsonl', 'ndjson'], 'CSV or JSON Lines files only!')
+    ])
+    images = FileField('Product Images (zip, optional)', validators=[
+        FileAllowed(['zip'], 'Zip archives only!')
+    ])
+    submit = SubmitField('Import Products')
 
 class CategoryForm(FlaskForm):
     name = StringField('Category Name',
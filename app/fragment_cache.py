@@ -0,0 +1,90 @@
+# app/fragment_cache.py
+import threading
+import time
+from flask import current_app, has_app_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from sqlalchemy import event
+from app import db
+from app.models import Category
+
+# Rendered template fragments (product and shop cards), shared by every page and every
+# visitor. Keys are built from the arguments of the `{% cache %}` tag, which include each
+# row's `cache_version`, so an updated product or shop simply renders under a new key.
+# Category names are shown on cards too; category writes bump a generation instead.
+
+
+class FragmentCache:
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get((self.generation, key))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key, html, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[(self.generation, key)] = (time.monotonic() + ttl, html)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+class FragmentCacheExtension(Extension):
+    """`{% cache 'product-card', product.id, product.cache_version %}...{% endcache %}`"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key_parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(key_parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, key_parts, caller):
+        cache = current_app.extensions.get('fragment_cache')
+        if cache is None:
+            return caller()
+        key = ':'.join(str(part) for part in key_parts)
+        html = cache.get(key)
+        if html is None:
+            html = caller()
+            cache.set(key, html, current_app.config['FRAGMENT_CACHE_TTL'])
+        return html
+
+
+def init_app(app):
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.extensions['fragment_cache'] = (FragmentCache(app.config['FRAGMENT_CACHE_MAX_ENTRIES'])
+                                        if app.config['FRAGMENT_CACHE_ENABLED'] else None)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_category_writes(session, flush_context):
+    if any(isinstance(obj, Category) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['fragment_cache_stale'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('fragment_cache_stale', False) and has_app_context():
+        cache = current_app.extensions.get('fragment_cache')
+        if cache is not None:
+            cache.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('fragment_cache_stale', None)
@@ -1,10 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+import hashlib
+import io
+import json
+from flask import Blueprint, Response, abort, current_app, render_template, redirect, url_for, flash, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
-from app.models import Shop, Product, Category, Order, OrderItem, User, Notification
-from app.forms import ShopForm, ProductForm, NewCategoryForm, ProfileForm, ChangePasswordForm
-from app import db
+from app.models import Shop, Product, Category, Order, OrderItem, User, Notification, ProductImport, category_version
+from app.forms import ShopForm, ProductForm, ProductImportForm, NewCategoryForm, ProfileForm, ChangePasswordForm
+from app import db, catalog, exports, product_import, pubsub, rollups
+from app.orders import change_order_status
 from app.utils import save_image
+from app.pagination import keyset_paginate
 from werkzeug.datastructures import FileStorage
+from sqlalchemy.orm import contains_eager, joinedload
 
 bp = Blueprint('marketer', __name__)
 
@@ -17,33 +23,24 @@ def dashboard():
 
     shops = current_user.shops.order_by(Shop.created_at.desc()).all()
 
-    marketer_shop_ids = [shop.id for shop in current_user.shops.all()]
-    total_products_count = Product.query.filter(Product.shop_id.in_(marketer_shop_ids)).count()
-
-
-    marketer_shop_ids = [shop.id for shop in current_user.shops.all()]
-    recent_order_items = OrderItem.query.filter(OrderItem.shop_id.in_(marketer_shop_ids))\
-                                    .order_by(OrderItem.id.desc())\
-                                    .limit(5).all()
-
-    recent_orders = []
-    seen_order_ids = set()
-    for item in recent_order_items:
-        if item.order_id not in seen_order_ids:
-            recent_orders.append(item.order)
-            seen_order_ids.add(item.order_id)
-
-    pending_orders_count = OrderItem.query.filter(
-        OrderItem.shop_id.in_(marketer_shop_ids),
-        OrderItem.order.has(Order.status == 'Pending')
-    ).count()
+    # Product counts for every shop in one grouped query
+    product_counts = dict(
+        db.session.query(Product.shop_id, db.func.count(Product.id))
+                  .filter(Product.shop_id.in_([shop.id for shop in shops]))
+                  .group_by(Product.shop_id).all()
+    )
+    total_products_count = sum(product_counts.values())
 
+    # Order, unit, revenue and pending KPIs plus the recent trend, from the daily rollup
+    sales, sales_trend = rollups.shop_sales_summary(current_user.id)
 
     return render_template('marketer/dashboard.html',
                          shops=shops,
+                         product_counts=product_counts,
                          total_products_count=total_products_count,
-                         recent_orders=recent_orders,
-                         pending_orders_count=pending_orders_count)
+                         sales=sales,
+                         sales_trend=sales_trend,
+                         pending_orders_count=sales['pending_orders'])
 
 
 @bp.route('/categories/create', methods=['GET', 'POST'])
@@ -76,21 +73,45 @@ def create_category():
 
     return render_template('marketer/create_category.html', form=form)
 
+@bp.route('/categories', methods=['GET'])
+@login_required
+def categories():
+    """Category choices for every shop of the marketer in one payload.
+
+    The strong ETag combines the category version counter with the marketer's shop ids,
+    so a revalidation costs two small queries and no serialization until either moves.
+    """
+    if current_user.role != 'marketer':
+        return jsonify({'error': 'Access denied.'}), 403
+
+    shop_ids = [shop_id for shop_id, in db.session.query(Shop.id).filter_by(user_id=current_user.id)
+                                                                .order_by(Shop.id)]
+    version = category_version()
+    etag = f"{version}-{hashlib.sha1(','.join(map(str, shop_ids)).encode()).hexdigest()[:16]}"
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({
+            'version': version,
+            'shops': {str(shop_id): [{'id': id_, 'name': name} for id_, name in choices]
+                      for shop_id, choices in catalog.categories_by_shop(shop_ids).items()},
+        })
+    response.set_etag(etag)
+    # Browsers may keep the body but must revalidate it on every use
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @bp.route('/categories_by_shop/<int:shop_id>', methods=['GET'])
 @login_required
 def categories_by_shop(shop_id):
+    # Single-shop lookup for admins editing any shop's product; marketers use categories()
     shop = Shop.query.get_or_404(shop_id)
     if shop.owner != current_user and current_user.role != 'admin':
         return jsonify({'error': 'Access denied to this shop\'s categories'}), 403
 
-    categories = Category.query.filter_by(shop_id=shop_id).all()
-
-    global_categories = Category.query.filter_by(shop_id=None).all()
-    
-    all_categories = categories + global_categories
-    
     return jsonify({
-        'categories': [{'id': c.id, 'name': c.name} for c in all_categories]
+        'categories': [{'id': id_, 'name': name} for id_, name in catalog.categories_by_shop([shop_id])[shop_id]]
     })
 
 
@@ -159,10 +180,78 @@ def manage_products():
         flash('Product added successfully!', 'success')
         return redirect(url_for('marketer.manage_products'))
 
-    products = Product.query.join(Shop).filter(Shop.user_id == current_user.id).all()
+    products = keyset_paginate(Product.query.join(Shop)
+                                            .options(contains_eager(Product.shop), joinedload(Product.category))
+                                            .filter(Shop.user_id == current_user.id),
+                               [Product.created_at, Product.id])
     return render_template('marketer/products.html',
                          form=form,
-                         products=products)
+                         products=products.items,
+                         pagination=products)
+
+@bp.route('/export')
+@login_required
+def export():
+    if current_user.role != 'marketer':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('customer.index'))
+
+    # Only rows belonging to this marketer's shops
+    try:
+        return exports.export_response(request.args, owner_id=current_user.id)
+    except exports.ExportError as error:
+        flash(str(error), 'danger')
+        return redirect(url_for('marketer.manage_products'))
+
+@bp.route('/products/import', methods=['GET', 'POST'])
+@login_required
+def import_products():
+    if current_user.role != 'marketer':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('customer.index'))
+
+    # Product files and image zips are far larger than a single form upload
+    request.max_content_length = current_app.config['IMPORT_MAX_CONTENT_LENGTH']
+    form = ProductImportForm()
+    form.shop_id.choices = [(s.id, s.name) for s in current_user.shops.all()]
+
+    if form.validate_on_submit():
+        shop = Shop.query.get_or_404(form.shop_id.data)
+        images = form.images.data if form.images.data and form.images.data.filename else None
+        job = product_import.start_import(current_user, shop, form.file.data, images)
+        flash('Import started. This page updates as batches are saved.', 'info')
+        return redirect(url_for('marketer.import_status', import_id=job.id))
+
+    imports = ProductImport.query.filter_by(user_id=current_user.id)\
+                                 .order_by(ProductImport.created_at.desc()).limit(10).all()
+    return render_template('marketer/import_products.html', form=form, imports=imports)
+
+@bp.route('/imports/<int:import_id>')
+@login_required
+def import_status(import_id):
+    job = ProductImport.query.get_or_404(import_id)
+    if job.user_id != current_user.id:
+        flash('Access denied.', 'danger')
+        return redirect(url_for('marketer.import_products'))
+
+    errors = json.loads(job.errors or '[]')
+    return render_template('marketer/import_status.html', job=job, errors=errors[:50],
+                           error_count=len(errors))
+
+@bp.route('/imports/<int:import_id>/errors.csv')
+@login_required
+def import_error_report(import_id):
+    job = ProductImport.query.get_or_404(import_id)
+    if job.user_id != current_user.id:
+        flash('Access denied.', 'danger')
+        return redirect(url_for('marketer.import_products'))
+
+    report = io.StringIO()
+    product_import.write_error_report(job, report)
+    response = Response(report.getvalue(), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename=import-{job.id}-errors.csv'
+    return response
+
 
 @bp.route('/shops/create', methods=['GET', 'POST'])
 @login_required
@@ -240,7 +329,7 @@ def shop_products(shop_id):
         flash('Product added successfully!', 'success')
         return redirect(url_for('marketer.shop_products', shop_id=shop_id))
 
-    products = Product.query.filter_by(shop_id=shop_id).all()
+    products = Product.query.options(joinedload(Product.category)).filter_by(shop_id=shop_id).all()
     return render_template('marketer/shop_products.html',
                          shop=shop,
                          form=form,
@@ -323,15 +412,19 @@ def marketer_orders():
     marketer_shop_ids = [shop.id for shop in current_user.shops.all()]
 
     if not marketer_shop_ids:
-        orders = []
+        orders = None
     else:
-        relevant_order_ids = db.session.query(OrderItem.order_id).filter(
+        relevant_order_ids = db.select(OrderItem.order_id).filter(
             OrderItem.shop_id.in_(marketer_shop_ids)
-        ).distinct().subquery()
+        ).distinct()
 
-        orders = Order.query.filter(Order.id.in_(relevant_order_ids)).order_by(Order.created_at.desc()).all()
+        orders = keyset_paginate(Order.query.options(joinedload(Order.customer))
+                                            .filter(Order.id.in_(relevant_order_ids)),
+                                 [Order.created_at, Order.id])
 
-    return render_template('marketer/orders.html', orders=orders)
+    return render_template('marketer/orders.html',
+                           orders=orders.items if orders else [],
+                           pagination=orders)
 
 @bp.route('/orders/<int:order_id>')
 @login_required
@@ -380,7 +473,16 @@ def update_order_status(order_id):
         flash('Access denied. You do not have permission to update this order.', 'danger')
         return redirect(url_for('marketer.marketer_orders'))
 
-    order.status = new_status
+    if not change_order_status(order, new_status):
+        db.session.rollback()
+        flash(f'Order {order.id} was updated by someone else in the meantime. '
+              'Check its status and try again.', 'warning')
+        return redirect(url_for('marketer.marketer_order_detail', order_id=order.id))
+    marketer_ids = db.session.scalars(
+        db.select(Shop.user_id).join(OrderItem, OrderItem.shop_id == Shop.id)
+                               .where(OrderItem.order_id == order.id).distinct()
+    ).all()
+    pubsub.publish(marketer_ids, pubsub.order_status_event(order.id, new_status))
     db.session.commit()
     flash(f'Order {order.id} status updated to {new_status}.', 'success')
     return redirect(url_for('marketer.marketer_order_detail', order_id=order.id))
@@ -442,6 +544,25 @@ def marketer_notifications():
                            all_notifications=all_notifications,
                            unread_notifications=unread_notifications)
 
+@bp.route('/notifications/stream')
+@login_required
+def notification_stream():
+    if current_user.role != 'marketer':
+        return jsonify({'error': 'Access denied.'}), 403
+    if not current_app.config['NOTIFICATION_STREAM']:
+        # A 404 also stops EventSources left open from before the stream was switched off
+        abort(404)
+
+    user_id = current_user.id
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    # Don't hold a pooled connection (or an open transaction) for the life of the stream
+    db.session.close()
+    response = Response(stream_with_context(pubsub.stream(user_id, last_event_id)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # NEW ROUTE: Mark Notification as Read
 @bp.route('/notifications/<int:notification_id>/mark_read', methods=['POST'])
 @login_required
@@ -452,7 +573,11 @@ def mark_notification_read(notification_id):
         flash('Access denied.', 'danger')
         return redirect(url_for('marketer.marketer_notifications'))
 
-    notification.is_read = True
+    # Flip the flag conditionally in SQL so two concurrent clicks decrement the badge once
+    marked = Notification.query.filter_by(id=notification.id, user_id=current_user.id, is_read=False)\
+                               .update({'is_read': True}, synchronize_session=False)
+    if marked:
+        current_user.adjust_unread_notifications(-marked)
     db.session.commit()
     flash('Notification marked as read.', 'info')
     return redirect(url_for('marketer.marketer_notifications'))
@@ -0,0 +1,292 @@
+# app/metrics.py
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from flask import Response, abort, current_app, g, request
+from flask_login import current_user
+from sqlalchemy import event
+from app import query_stats
+
+# Prometheus text-format metrics for requests and the database. Each process keeps its
+# own counters in memory. With METRICS_DIR set (required under gunicorn), a background
+# thread snapshots them to METRICS_DIR/metrics-<pid>.json every METRICS_FLUSH_INTERVAL
+# seconds and /metrics sums the files of every worker. Counters of workers that have
+# exited are kept so totals stay monotonic; gauges only count live processes. Clear the
+# directory when the server is (re)started.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTERS = {
+    'http_requests_total': 'Requests handled, by endpoint, method and status.',
+    'sql_queries_total': 'SQL statements executed while handling requests, by endpoint.',
+    'sql_duration_seconds_total': 'Time spent in SQL statements while handling requests, by endpoint.',
+    'db_pool_checkouts_total': 'Connections checked out of the engine pool.',
+    'db_pool_connections_total': 'New DBAPI connections opened by the engine pool.',
+}
+GAUGES = {
+    'http_requests_in_flight': 'Requests currently being handled.',
+    'db_pool_size': 'Configured size of the engine pool.',
+    'db_pool_checked_out': 'Connections currently checked out of the engine pool.',
+    'db_pool_overflow': 'Connections open beyond the pool size.',
+}
+HISTOGRAM = ('http_request_duration_seconds', 'Request latency in seconds, by endpoint and method.')
+
+
+class MetricsRegistry:
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.counters = defaultdict(float)  # (name, labels) -> value
+        self.histograms = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self.in_flight = 0
+
+    def inc(self, name, labels=(), amount=1):
+        with self.lock:
+            self.counters[(name, labels)] += amount
+
+    def observe(self, labels, seconds):
+        with self.lock:
+            entry = self.histograms.setdefault(labels, [0] * (len(LATENCY_BUCKETS) + 2))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    entry[i] += 1
+                    break
+            else:
+                entry[len(LATENCY_BUCKETS)] += 1
+            entry[-1] += seconds
+
+    def adjust_in_flight(self, delta):
+        with self.lock:
+            self.in_flight += delta
+
+    def gauges(self):
+        values = {'http_requests_in_flight': self.in_flight}
+        pool = self.engine.pool if self.engine is not None else None
+        # SingletonThreadPool/NullPool (in-memory SQLite, tests) don't track these
+        for name, method in (('db_pool_size', 'size'), ('db_pool_checked_out', 'checkedout'),
+                             ('db_pool_overflow', 'overflow')):
+            if hasattr(pool, method):
+                values[name] = getattr(pool, method)()
+        if 'db_pool_overflow' in values:
+            # QueuePool counts overflow from -size while the pool is still filling
+            values['db_pool_overflow'] = max(values['db_pool_overflow'], 0)
+        return values
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[list(labels), list(entry)] for labels, entry in self.histograms.items()],
+                'gauges': self.gauges(),
+            }
+
+
+class FileStore:
+    """One JSON snapshot per process in a shared directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, pid):
+        return os.path.join(self.directory, f'metrics-{pid}.json')
+
+    def write(self, pid, snapshot):
+        path = self.path(pid)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def read_all(self):
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith('metrics-') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots.append((int(name[len('metrics-'):-len('.json')]), json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(snapshots):
+    """Sum per-process snapshots; gauges only from processes that are still running."""
+    counters = defaultdict(float)
+    histograms = {}
+    gauges = defaultdict(float)
+    for pid, snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(labels))] += value
+        for labels, entry in snapshot['histograms']:
+            merged = histograms.setdefault(tuple(labels), [0] * len(entry))
+            for i, value in enumerate(entry):
+                merged[i] += value
+        if pid == os.getpid() or _pid_alive(pid):
+            for name, value in snapshot['gauges'].items():
+                gauges[name] += value
+    return counters, histograms, gauges
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+LABEL_NAMES = {
+    'http_requests_total': ('endpoint', 'method', 'status'),
+    'sql_queries_total': ('endpoint',),
+    'sql_duration_seconds_total': ('endpoint',),
+}
+
+
+def render(counters, histograms, gauges, prefix):
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {prefix}{name} {help_text}', f'# TYPE {prefix}{name} counter']
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{prefix}{name}{_labels(LABEL_NAMES.get(name, ()), labels)} {value:g}')
+
+    name, help_text = HISTOGRAM
+    lines += [f'# HELP {prefix}{name} {help_text}', f'# TYPE {prefix}{name} histogram']
+    for labels, entry in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), entry[:-1]):
+            cumulative += count
+            le = bound if bound == '+Inf' else f'{bound:g}'
+            lines.append(f"{prefix}{name}_bucket{_labels(('endpoint', 'method'), labels, [('le', le)])} {cumulative:g}")
+        lines.append(f"{prefix}{name}_sum{_labels(('endpoint', 'method'), labels)} {entry[-1]:.6f}")
+        lines.append(f"{prefix}{name}_count{_labels(('endpoint', 'method'), labels)} {cumulative:g}")
+
+    for name, help_text in GAUGES.items():
+        if name in gauges:
+            lines += [f'# HELP {prefix}{name} {help_text}', f'# TYPE {prefix}{name} gauge',
+                      f'{prefix}{name} {gauges[name]:g}']
+    return '\n'.join(lines) + '\n'
+
+
+class Metrics:
+    def __init__(self, app, engine):
+        self.registry = MetricsRegistry(engine)
+        directory = app.config['METRICS_DIR']
+        self.store = FileStore(directory) if directory else None
+        self.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+        self.flusher_pid = None
+
+    def ensure_process(self):
+        # gunicorn forks workers from the app built in the master: start over per worker
+        pid = os.getpid()
+        if self.registry.pid != pid:
+            self.registry = MetricsRegistry(self.registry.engine)
+        if self.store is not None and self.flusher_pid != pid:
+            self.flusher_pid = pid
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        if self.store is not None:
+            self.store.write(os.getpid(), self.registry.snapshot())
+
+    def collect(self):
+        if self.store is None:
+            return merge([(os.getpid(), self.registry.snapshot())])
+        self.flush()
+        return merge(self.store.read_all())
+
+
+def _metrics():
+    return current_app.extensions['metrics']
+
+
+def _start_request():
+    metrics = _metrics()
+    metrics.ensure_process()
+    metrics.registry.adjust_in_flight(1)
+    g.metrics_started_at = time.perf_counter()
+
+
+def _finish_request(response):
+    started_at = g.get('metrics_started_at')
+    if started_at is None:
+        return response
+    registry = _metrics().registry
+    endpoint = request.endpoint or 'unmatched'
+    registry.observe((endpoint, request.method), time.perf_counter() - started_at)
+    registry.inc('http_requests_total', (endpoint, request.method, str(response.status_code)))
+    stats = query_stats.current_stats()
+    if stats is not None:
+        if response.is_streamed:
+            # The body's queries run while it streams; count them once it has been sent
+            response.call_on_close(lambda: _count_queries(registry, endpoint, stats))
+        else:
+            _count_queries(registry, endpoint, stats)
+    return response
+
+
+def _count_queries(registry, endpoint, stats):
+    if stats.count:
+        registry.inc('sql_queries_total', (endpoint,), stats.count)
+        registry.inc('sql_duration_seconds_total', (endpoint,), stats.duration)
+
+
+def _end_request(exc):
+    if g.pop('metrics_started_at', None) is not None:
+        _metrics().registry.adjust_in_flight(-1)
+
+
+def metrics_view():
+    allowed = current_app.config['METRICS_ALLOWED_IPS']
+    is_admin = current_user.is_authenticated and current_user.role == 'admin'
+    if not is_admin and request.remote_addr not in allowed:
+        abort(403)
+    counters, histograms, gauges = _metrics().collect()
+    body = render(counters, histograms, gauges, current_app.config['METRICS_PREFIX'])
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app, db):
+    """Register request hooks, engine pool listeners and the /metrics endpoint."""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    metrics = Metrics(app, engine)
+    app.extensions['metrics'] = metrics
+
+    # Listeners look the registry up through the extension so a forked worker's fresh
+    # registry is the one that gets counted
+    event.listen(engine, 'checkout', lambda *args: metrics.registry.inc('db_pool_checkouts_total'))
+    event.listen(engine, 'connect', lambda *args: metrics.registry.inc('db_pool_connections_total'))
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
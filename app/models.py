@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db, login
+from sqlalchemy import case, event, func, select
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -11,17 +12,29 @@ class User(UserMixin, db.Model):
     role = db.Column(db.String(20), default='customer')  # 'admin', 'marketer', 'customer'
     is_approved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Stored count of unread notifications so the navbar badge needs no query
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     shops = db.relationship('Shop', backref='owner', lazy='dynamic')
     ratings = db.relationship('Rating', backref='user', lazy='dynamic')
     orders = db.relationship('Order', backref='customer', lazy='dynamic')
     notifications = db.relationship('Notification', backref='user', lazy='dynamic') # New: User can have notifications
 
+    __table_args__ = (
+        # Admin user list, newest first with an id tiebreak (keyset pagination)
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+    )
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def adjust_unread_notifications(self, delta):
+        # SQL expression so concurrent orders and reads can't lose updates; never below zero
+        new_count = User.unread_notifications + delta
+        self.unread_notifications = case((new_count > 0, new_count), else_=0)
+
     @classmethod
     def create_default_admin(cls, username, email, password):
         admin = cls.query.filter_by(username=username).first()
@@ -31,9 +44,34 @@ class User(UserMixin, db.Model):
             db.session.add(admin)
             db.session.commit()
 
+def _apply_rating_delta(obj, value_delta, count_delta):
+    # Emit the aggregate update as SQL expressions so concurrent raters can't lose increments
+    cls = type(obj)
+    new_sum = cls.rating_sum + value_delta
+    new_count = cls.rating_count + count_delta
+    obj.rating_sum = new_sum
+    obj.rating_count = new_count
+    obj.rating_avg = case((new_count > 0, new_sum * 1.0 / new_count), else_=0)
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_cache_versions(session, flush_context, instances):
+    for obj in session.dirty:
+        if isinstance(obj, (Shop, Product)) and session.is_modified(obj, include_collections=False):
+            obj.cache_version = type(obj).cache_version + 1
+
+    # Any category write moves the shared category version, in the same transaction
+    if any(isinstance(obj, Category) for obj in (*session.new, *session.dirty, *session.deleted)):
+        counter = session.get(CatalogCounter, CATEGORY_VERSION)
+        if counter is None:
+            session.add(CatalogCounter(name=CATEGORY_VERSION, value=1))
+        else:
+            counter.value = CatalogCounter.value + 1
+
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    # Served from a short-lived per-process cache; see app/user_cache.py
+    from app import user_cache
+    return user_cache.load_user(int(id))
 
 class Shop(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -44,6 +82,12 @@ class Shop(db.Model):
     logo = db.Column(db.String(100), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized rating aggregates, maintained in the same transaction as Rating writes
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    # Bumped on every update; part of the rendered-card fragment cache key
+    cache_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     products = db.relationship('Product', backref='shop', lazy='dynamic')
     ratings = db.relationship('Rating', backref='shop', lazy='dynamic')
 
@@ -59,11 +103,17 @@ class Shop(db.Model):
         return ''
 
     def average_rating(self):
-        ratings = [rating.value for rating in self.ratings]
-        return round(sum(ratings) / len(ratings), 2) if ratings else 0
+        return round(self.rating_avg or 0, 2)
+
+    def apply_rating_delta(self, value_delta, count_delta=0):
+        _apply_rating_delta(self, value_delta, count_delta)
 
     __table_args__ = (
         db.UniqueConstraint('name', 'user_id', name='unique_shop_per_user'),
+        # Storefront and admin shop lists, newest first with an id tiebreak
+        db.Index('ix_shop_created_at_id', 'created_at', 'id'),
+        # A marketer's shops, which drive their product list and dashboard
+        db.Index('ix_shop_user_id', 'user_id'),
     )
 
 class Category(db.Model):
@@ -76,6 +126,15 @@ class Category(db.Model):
         db.UniqueConstraint('name', 'shop_id', name='unique_category_per_shop'),
     )
 
+class CatalogCounter(db.Model):
+    # Named counters bumped in the same transaction as the writes they track; clients
+    # build validators (ETags) from them instead of re-reading the rows
+    __tablename__ = 'catalog_counter'
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+CATEGORY_VERSION = 'categories'
+
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -86,15 +145,33 @@ class Product(db.Model):
     shop_id = db.Column(db.Integer, db.ForeignKey('shop.id'))
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized rating aggregates, maintained in the same transaction as Rating writes
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    # Bumped on every update; part of the rendered-card fragment cache key
+    cache_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     ratings = db.relationship('Rating', backref='product', lazy='dynamic')
     order_items = db.relationship('OrderItem', backref='product_ordered', lazy='dynamic')
 
+    __table_args__ = (
+        # Storefront shop page / category filters, and the "newest active products" listings
+        db.Index('ix_product_shop_id_is_active_category_id', 'shop_id', 'is_active', 'category_id'),
+        db.Index('ix_product_is_active_created_at', 'is_active', 'created_at'),
+        # Keyset orders: the admin list (all products) and the price and rating search sorts
+        db.Index('ix_product_created_at_id', 'created_at', 'id'),
+        db.Index('ix_product_is_active_price_id', 'is_active', 'price', 'id'),
+        db.Index('ix_product_is_active_rating_avg_id', 'is_active', 'rating_avg', 'id'),
+    )
+
     def formatted_price(self):
         return f"₦{self.price:,.2f}" if self.price else "₦0.00"
 
     def average_rating(self):
-        ratings = [rating.value for rating in self.ratings]
-        return round(sum(ratings) / len(ratings), 2) if ratings else 0
+        return round(self.rating_avg or 0, 2)
+
+    def apply_rating_delta(self, value_delta, count_delta=0):
+        _apply_rating_delta(self, value_delta, count_delta)
 
 class Rating(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -105,6 +182,11 @@ class Rating(db.Model):
     shop_id = db.Column(db.Integer, db.ForeignKey('shop.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # One rating per customer per product; also serves the existing-rating lookup
+        db.Index('ix_rating_product_id_user_id', 'product_id', 'user_id', unique=True),
+    )
+
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -114,6 +196,10 @@ class Order(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     items = db.relationship('OrderItem', backref='order', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_order_user_id_created_at', 'user_id', 'created_at'),
+    )
+
     def formatted_total_price(self):
         return f"₦{self.total_price:,.2f}"
 
@@ -125,12 +211,71 @@ class OrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price_at_purchase = db.Column(db.Float, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_order_item_shop_id', 'shop_id'),
+    )
+
     def subtotal(self):
         return self.quantity * self.price_at_purchase
 
     def formatted_subtotal(self):
         return f"₦{self.subtotal():,.2f}"
 
+class CartItem(db.Model):
+    # Server-side cart line; the session only carries the opaque cart_id
+    id = db.Column(db.Integer, primary_key=True)
+    cart_id = db.Column(db.String(64), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('cart_id', 'product_id', name='unique_product_per_cart'),
+    )
+
+class ProductImport(db.Model):
+    # One bulk product import (app/product_import.py); counters are committed with each batch
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey('shop.id', ondelete='CASCADE'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    bytes_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bytes_read = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rows_read = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rows_imported = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rows_failed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # JSON list of {"row", "field", "message"}, capped at IMPORT_MAX_ERRORS entries
+    errors = db.Column(db.Text)
+    message = db.Column(db.String(255))  # why a failed import stopped
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    shop = db.relationship('Shop')
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    def progress_percent(self):
+        if self.is_finished:
+            return 100
+        return int(self.bytes_read * 100 / self.bytes_total) if self.bytes_total else 0
+
+class ShopDailyStats(db.Model):
+    # Per-shop, per-day sales rollup maintained by app/rollups.py; cancelled orders are excluded
+    __tablename__ = 'shop_daily_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey('shop.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    orders = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    units = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    revenue = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    pending_orders = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.UniqueConstraint('shop_id', 'day', name='unique_stats_per_shop_day'),
+    )
+
 # NEW MODEL: Notification
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -141,3 +286,39 @@ class Notification(db.Model):
     # Optional: link to a specific order or product if needed
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notification_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+    )
+
+
+def recompute_rating_aggregates():
+    """Rebuild the stored rating_count/rating_sum/rating_avg columns from the Rating table."""
+    for model, fk in ((Product, Rating.product_id), (Shop, Rating.shop_id)):
+        count_q = select(func.count(Rating.id)).where(fk == model.id).scalar_subquery()
+        sum_q = select(func.coalesce(func.sum(Rating.value), 0)).where(fk == model.id).scalar_subquery()
+        avg_q = select(func.coalesce(func.avg(Rating.value), 0)).where(fk == model.id).scalar_subquery()
+        db.session.execute(
+            db.update(model).values(rating_count=count_q, rating_sum=sum_q, rating_avg=avg_q,
+                                    cache_version=model.cache_version + 1)
+        )
+    db.session.commit()
+
+def recompute_unread_notifications():
+    """Rebuild every user's stored unread notification count from the Notification table."""
+    unread_q = select(func.count(Notification.id))\
+        .where(Notification.user_id == User.id, Notification.is_read == False).scalar_subquery()
+    db.session.execute(db.update(User).values(unread_notifications=unread_q))
+    db.session.commit()
+
+def category_version():
+    """The category version counter; it moves on every committed Category write."""
+    return db.session.query(CatalogCounter.value).filter_by(name=CATEGORY_VERSION).scalar() or 0
+
+def bump_category_version():
+    """Move the category version after category rows were written outside the ORM."""
+    updated = db.session.execute(db.update(CatalogCounter).where(CatalogCounter.name == CATEGORY_VERSION)
+                                   .values(value=CatalogCounter.value + 1)).rowcount
+    if not updated:
+        db.session.add(CatalogCounter(name=CATEGORY_VERSION, value=1))
+    db.session.commit()
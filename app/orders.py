@@ -0,0 +1,73 @@
+# app/orders.py
+from app import db, pubsub, rollups
+from app.models import Order, OrderItem, Notification, User
+
+
+def place_order(customer, cart_items):
+    """Create an order for `customer` from hydrated cart lines in a single transaction.
+
+    The order row is inserted first to obtain its id, then every OrderItem and every
+    marketer Notification goes out as one multi-row INSERT each, followed by a single
+    UPDATE of the marketers' unread notification counters. The shop_daily_stats rollup
+    is adjusted in the same transaction. Live events for the new
+    notifications are published once the caller commits. The products (and their
+    shops) already loaded while validating the cart are reused, so nothing is re-queried.
+    The caller commits.
+    """
+    new_order = Order(
+        user_id=customer.id,
+        total_price=sum(item.subtotal for item in cart_items),
+        status='Pending'
+    )
+    db.session.add(new_order)
+    db.session.flush()
+
+    db.session.execute(db.insert(OrderItem), [
+        {
+            'order_id': new_order.id,
+            'product_id': item.product.id,
+            'shop_id': item.product.shop_id,
+            'quantity': item.quantity,
+            'price_at_purchase': item.price,
+        }
+        for item in cart_items
+    ])
+
+    rollups.record_status_change(
+        new_order,
+        [(item.product.shop_id, item.quantity, item.price) for item in cart_items],
+        None, new_order.status
+    )
+
+    marketer_ids = sorted({item.product.shop.user_id for item in cart_items})
+    message = f"New order #{new_order.id} placed by {customer.username} containing your products."
+    notifications = db.session.scalars(db.insert(Notification).returning(Notification), [
+        {'user_id': marketer_id, 'message': message, 'order_id': new_order.id}
+        for marketer_id in marketer_ids
+    ]).all()
+    for notification in notifications:
+        pubsub.publish([notification.user_id], pubsub.notification_event(notification))
+    db.session.execute(
+        db.update(User).where(User.id.in_(marketer_ids))
+                       .values(unread_notifications=User.unread_notifications + 1)
+    )
+
+    return new_order
+
+
+def change_order_status(order, new_status):
+    """Move `order` to `new_status` and adjust the shop_daily_stats rollup to match.
+
+    The UPDATE only matches while the order still has the status read by this request,
+    so of two concurrent changes only one applies its rollup delta. Returns False, having
+    changed nothing, when another request got there first. The caller commits.
+    """
+    old_status = order.status
+    result = db.session.execute(
+        db.update(Order).where(Order.id == order.id, Order.status == old_status)
+                        .values(status=new_status)
+    )
+    if result.rowcount == 0:
+        return False
+    rollups.record_status_change(order, rollups.order_lines(order.id), old_status, new_status)
+    return True
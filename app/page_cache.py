@@ -0,0 +1,135 @@
+# app/page_cache.py
+import threading
+import time
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from app import db
+from app.models import Shop, Product, Category, Rating
+
+# Full-page cache for storefront pages as seen by anonymous visitors. Entries are keyed
+# on endpoint, view args and query string plus a generation number; any committed write
+# to the catalog bumps the generation, which retires every entry at once. TTLs bound how
+# long another worker process can serve a page after a write it did not see.
+
+CATALOG_MODELS = (Shop, Product, Category, Rating)
+
+
+class PageCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        generation, expires_at, payload = entry
+        if generation != self.generation or expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return payload
+
+    def set(self, key, payload, ttl):
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = (self.generation, time.monotonic() + ttl, payload)
+
+    def lock_for(self, key):
+        # One lock per cold key so concurrent misses render the page only once
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                if len(self._locks) >= self.max_entries:
+                    self._locks.clear()
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def invalidate(self):
+        self.generation += 1
+        self._entries.clear()
+
+
+def init_app(app):
+    app.extensions['page_cache'] = PageCache(app.config['PAGE_CACHE_MAX_ENTRIES'])
+
+
+def _cache():
+    return current_app.extensions['page_cache']
+
+
+def _is_cacheable():
+    return (current_app.config['PAGE_CACHE_ENABLED']
+            and request.method == 'GET'
+            and not current_user.is_authenticated
+            and not session.get('cart_count')
+            and not session.get('_flashes'))
+
+
+def cached(view):
+    """Serve the view from the page cache for anonymous visitors with an empty cart."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _is_cacheable():
+            return view(*args, **kwargs)
+
+        cache = _cache()
+        key = (request.endpoint,
+               tuple(sorted(kwargs.items())),
+               tuple(sorted(request.args.items(multi=True))))
+
+        payload = cache.get(key)
+        status = 'HIT'
+        if payload is None:
+            with cache.lock_for(key):
+                payload = cache.get(key)
+                if payload is None:
+                    status = 'MISS'
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    payload = (response.get_data(), response.mimetype)
+                    cache.set(key, payload, current_app.config['PAGE_CACHE_TTL'])
+
+        body, mimetype = payload
+        response = make_response(body)
+        response.mimetype = mimetype
+        response.headers['X-Page-Cache'] = status
+        return response
+    return wrapper
+
+
+def _touches_catalog(objects):
+    return any(isinstance(obj, CATALOG_MODELS) for obj in objects)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_catalog_writes(session, flush_context):
+    if _touches_catalog(session.new) or _touches_catalog(session.dirty) or _touches_catalog(session.deleted):
+        session.info['page_cache_stale'] = True
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _track_bulk_catalog_writes(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements (product imports, rating recomputation) bypass the flush
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ in CATALOG_MODELS:
+        orm_execute_state.session.info['page_cache_stale'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('page_cache_stale', False):
+        cache = current_app.extensions.get('page_cache') if has_app_context() else None
+        if cache is not None:
+            cache.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('page_cache_stale', None)
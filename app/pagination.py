@@ -0,0 +1,162 @@
+# app/pagination.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from flask import abort, current_app, request
+from sqlalchemy import Table, false
+from app import db
+
+
+def encode_cursor(values):
+    # Opaque, URL-safe token holding the sort key of a boundary row
+    payload = [['dt', v.isoformat()] if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Return the list of sort key values in the token, or None if it's malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = [datetime.fromisoformat(v[1]) if isinstance(v, list) and v[:1] == ['dt'] else v
+                  for v in payload]
+    except (binascii.Error, ValueError, TypeError, IndexError):
+        return None
+    if len(values) != length:
+        return None
+    return values
+
+
+def _python_type(key):
+    try:
+        return key.type.python_type
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+def _check_cursor(keys, values):
+    # A cursor is client input: values of the wrong type would only fail inside the database
+    for key, value in zip(keys, values):
+        expected = _python_type(key)
+        if value is None or expected is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, expected if expected is not float else (int, float)):
+            return None
+    return values
+
+
+def _nullable(key):
+    # Only real table columns; rank columns from the search subqueries are never NULL
+    column = getattr(key, 'expression', key)
+    return isinstance(getattr(column, 'table', None), Table) and bool(getattr(column, 'nullable', False))
+
+
+def _seek(keys, values, greater):
+    """WHERE clause for the rows past the cursor `values`, walking up (`greater`) or down.
+
+    Normally this is a plain row-value comparison, which the databases turn into a single
+    index range. NULL never compares, though, so rows with a NULL key would silently drop
+    out after page 1. They're placed where the dialect sorts them anyway (PostgreSQL: above
+    every value; SQLite and MySQL: below), so the index order still holds, and matched
+    explicitly whenever the walk is heading towards them.
+    """
+    nullable = [_nullable(key) for key in keys]
+    nulls_high = db.engine.dialect.name == 'postgresql'
+    if None not in values and (not any(nullable) or greater != nulls_high):
+        return db.tuple_(*keys) > db.tuple_(*values) if greater else db.tuple_(*keys) < db.tuple_(*values)
+
+    def past(key, value, is_nullable):
+        if value is None:
+            # Beyond NULL only lie the values, and only when walking away from the NULL end
+            return key.is_not(None) if greater != nulls_high else false()
+        condition = key > value if greater else key < value
+        if is_nullable and greater == nulls_high:
+            condition = db.or_(condition, key.is_(None))
+        return condition
+
+    clauses = []
+    for i, (key, value, is_nullable) in enumerate(zip(keys, values, nullable)):
+        equal = [k.is_(None) if v is None else k == v for k, v in zip(keys[:i], values[:i])]
+        clauses.append(db.and_(*equal, past(key, value, is_nullable)))
+    return db.or_(*clauses)
+
+
+class KeysetPagination:
+    """One page of a seek-paginated query.
+
+    Exposes `items` plus the `has_prev`/`has_next` flags and `prev_cursor`/`next_cursor`
+    tokens used by the `render_pagination` macro, and `query_args` (the current request
+    arguments minus the cursor) so page links keep the active filters and sort order.
+    """
+
+    def __init__(self, items, per_page, prev_cursor, next_cursor):
+        self.items = items
+        self.per_page = per_page
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+        self.query_args = {key: value for key, value in request.args.items()
+                           if key not in ('after', 'before')}
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, keys, descending=True, per_page=None):
+    """Seek-paginate `query` on the ordered `keys` columns (the last one must be unique,
+    normally the primary key) using the `after`/`before` cursors in the request args.
+
+    The query must not carry its own ORDER BY. Each page reads from its cursor with
+    LIMIT per_page + 1 rather than skipping an OFFSET. When an index matches `keys`, that
+    read is a range scan on it, so a page costs the same however deep it is; the exception
+    is a nullable key walked towards its NULL end, whose IS NULL branch (see `_seek`) may
+    keep the planner from using the index as a range.
+    A cursor that doesn't decode to values of the keys' types is rejected with a 400.
+    """
+    per_page = per_page or current_app.config['ITEMS_PER_PAGE']
+
+    cursors = {}
+    for name in ('after', 'before'):
+        token = request.args.get(name)
+        if token:
+            values = decode_cursor(token, len(keys))
+            if values is None or _check_cursor(keys, values) is None:
+                abort(400, 'Invalid page cursor.')
+            cursors[name] = values
+    after, before = cursors.get('after'), cursors.get('before')
+
+    # Walking backwards means flipping both the comparison and the ordering
+    backwards = before is not None
+    if backwards:
+        query = query.filter(_seek(keys, before, greater=descending))
+    elif after is not None:
+        query = query.filter(_seek(keys, after, greater=not descending))
+
+    newest_first = descending != backwards
+    ordering = [k.desc() if newest_first else k.asc() for k in keys]
+    rows = query.add_columns(*keys).order_by(*ordering).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    items = [row[0] for row in rows]
+    prev_cursor = encode_cursor(rows[0][1:]) if rows and has_prev else None
+    next_cursor = encode_cursor(rows[-1][1:]) if rows and has_next else None
+    return KeysetPagination(items, per_page, prev_cursor, next_cursor)
@@ -0,0 +1,73 @@
+# app/platform_stats.py
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models import User, Shop, Product, Category, Order
+
+
+class StatsCache:
+    """The last computed stats for one app, refreshed at most once per `ttl` seconds."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.expires_at = 0.0
+        self.stats = None
+
+
+def init_app(app):
+    app.extensions['platform_stats'] = StatsCache(app.config['ADMIN_STATS_TTL'])
+
+
+def _compute():
+    # Users by role and approval state: one grouped query
+    users_by_role = {}
+    pending_approval = 0
+    total_users = 0
+    for role, is_approved, count in db.session.query(User.role, User.is_approved, func.count(User.id))\
+                                              .group_by(User.role, User.is_approved).all():
+        role = role or 'customer'
+        entry = users_by_role.setdefault(role, {'approved': 0, 'pending': 0})
+        entry['approved' if is_approved else 'pending'] += count
+        total_users += count
+        if not is_approved:
+            pending_approval += count
+
+    # Catalog and order totals: one round trip of scalar subqueries
+    not_cancelled = Order.status != 'Cancelled'
+    row = db.session.execute(select(
+        select(func.count(Shop.id)).scalar_subquery(),
+        select(func.count(Product.id)).scalar_subquery(),
+        select(func.count(Product.id)).where(Product.is_active == True).scalar_subquery(),
+        select(func.count(Category.id)).scalar_subquery(),
+        select(func.count(Order.id)).scalar_subquery(),
+        select(func.coalesce(func.sum(Order.total_price), 0)).where(not_cancelled).scalar_subquery(),
+    )).one()
+    shops, products, active_products, categories, orders, gmv = row
+
+    return {
+        'total_users': total_users,
+        'users_by_role': users_by_role,
+        'pending_approval': pending_approval,
+        'shops': shops,
+        'products': products,
+        'active_products': active_products,
+        'categories': categories,
+        'orders': orders,
+        'gmv': float(gmv or 0),
+    }
+
+
+def platform_stats():
+    """Platform-wide counts and GMV, cached for ADMIN_STATS_TTL seconds per process."""
+    cache = current_app.extensions['platform_stats']
+    if cache.stats is not None and cache.expires_at > time.monotonic():
+        return cache.stats
+    with cache.lock:
+        # Another thread may have refreshed while we waited
+        if cache.stats is None or cache.expires_at <= time.monotonic():
+            cache.stats = _compute()
+            cache.expires_at = time.monotonic() + cache.ttl
+        return cache.stats
@@ -0,0 +1,332 @@
+# app/product_import.py
+import csv
+import io
+import json
+import logging
+import math
+import os
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+from app import db, catalog, search
+from app.models import Product, ProductImport, Shop
+from app.utils import save_image
+
+# Bulk product import from CSV or JSON Lines, with product images in an optional zip.
+# The file is read row by row and never held in memory; rows are checked against the
+# shop's categories (loaded once) and written with one multi-row INSERT per batch of
+# IMPORT_BATCH_SIZE products, committed together with the job's progress counters.
+# A row that fails validation is skipped and reported; it never fails the import.
+#
+# Columns (CSV header or JSON keys):
+#   name         required, up to 100 characters
+#   price        required, a number >= 0
+#   category     category name, or `category_id`; one of the shop's or a global category
+#   description  optional, up to 500 characters
+#   is_active    optional, true/false/yes/no/1/0 (default true)
+#   image        optional, file name of an image inside the zip
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif'}
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+_executor = None
+
+
+class RowError(ValueError):
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+        self.message = message
+
+
+def detect_format(filename):
+    """'csv' or 'jsonl' from the file extension, or None."""
+    return FORMATS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def iter_rows(binary, fmt):
+    """Yield (line number, dict or RowError) for each record of a binary file object."""
+    text = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Columns beyond the header land under the None key
+            if None in row:
+                yield reader.line_num, RowError('', 'Row has more columns than the header.')
+            else:
+                yield reader.line_num, row
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, RowError('', 'Line is not valid JSON.')
+            continue
+        yield number, row if isinstance(row, dict) else RowError('', 'Line is not a JSON object.')
+
+
+def _text(row, field):
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+
+class RowValidator:
+    """Turns raw rows into Product column values for one shop, without any queries."""
+
+    def __init__(self, shop_id, images=None):
+        self.shop_id = shop_id
+        self.images = images
+        # The shop's own categories win over global ones of the same name
+        self.category_ids = set()
+        self.category_names = {}
+        for category_id, name in catalog.categories_by_shop([shop_id])[shop_id]:
+            self.category_ids.add(category_id)
+            self.category_names.setdefault(name.strip().lower(), category_id)
+        # Zip members by lower-cased base name, so rows can ignore folders inside the archive
+        self.image_members = {}
+        if images is not None:
+            for member in images.infolist():
+                if not member.is_dir():
+                    self.image_members.setdefault(os.path.basename(member.filename).lower(), member)
+
+    def __call__(self, row):
+        name = _text(row, 'name')
+        if not name:
+            raise RowError('name', 'Name is required.')
+        if len(name) > 100:
+            raise RowError('name', 'Name must be at most 100 characters.')
+
+        description = _text(row, 'description')
+        if len(description) > 500:
+            raise RowError('description', 'Description must be at most 500 characters.')
+
+        try:
+            price = float(_text(row, 'price').replace(',', ''))
+        except ValueError:
+            raise RowError('price', 'Price must be a number.')
+        if not (math.isfinite(price) and price >= 0):
+            raise RowError('price', 'Price must be zero or more.')
+
+        values = {'name': name, 'description': description or None, 'price': price,
+                  'shop_id': self.shop_id, 'category_id': self._category(row),
+                  'is_active': self._is_active(row), 'image': None}
+        member = self._image_member(row)
+        if member is not None:
+            # Through the upload pipeline, so the image gets the same variants as a form upload
+            with self.images.open(member) as stream:
+                values['image'] = save_image(FileStorage(stream=stream,
+                                                         filename=os.path.basename(member.filename)))
+        return values
+
+    def _category(self, row):
+        category_id = _text(row, 'category_id')
+        if category_id:
+            if not category_id.isdigit() or int(category_id) not in self.category_ids:
+                raise RowError('category_id', f'Category {category_id} is not available to this shop.')
+            return int(category_id)
+        category = _text(row, 'category')
+        if not category:
+            raise RowError('category', 'Category is required.')
+        if category.lower() not in self.category_names:
+            raise RowError('category', f"Category '{category}' does not exist for this shop.")
+        return self.category_names[category.lower()]
+
+    def _is_active(self, row):
+        value = row.get('is_active')
+        if isinstance(value, bool):
+            return value
+        value = _text(row, 'is_active').lower()
+        if not value or value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise RowError('is_active', 'is_active must be true or false.')
+
+    def _image_member(self, row):
+        image = _text(row, 'image')
+        if not image:
+            return None
+        if os.path.splitext(image)[1].lower() not in IMAGE_EXTENSIONS:
+            raise RowError('image', 'Image must be a jpg, jpeg, png or gif file.')
+        if self.images is None:
+            raise RowError('image', 'Row names an image but no image zip was uploaded.')
+        member = self.image_members.get(os.path.basename(image).lower())
+        if member is None:
+            raise RowError('image', f"Image '{image}' is not in the zip.")
+        return member
+
+
+def _insert_batch(rows):
+    ids = db.session.scalars(db.insert(Product).returning(Product.id), rows).all()
+    search.index_products(ids)
+
+
+def run_import(job_id, path, images_path=None, fmt=None, echo=None):
+    """Import the products in `path` for the ProductImport `job_id`; returns the job."""
+    job = db.session.get(ProductImport, job_id)
+    fmt = fmt or detect_format(job.filename)
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    max_errors = current_app.config['IMPORT_MAX_ERRORS']
+
+    job.status = 'running'
+    job.bytes_total = os.path.getsize(path)
+    db.session.commit()
+
+    batch, errors = [], []
+    rows_read = rows_imported = rows_failed = 0
+    unsaved_rows = 0
+
+    def commit(position):
+        nonlocal batch, rows_imported, unsaved_rows
+        progressed = unsaved_rows > 0
+        if batch:
+            _insert_batch(batch)
+            rows_imported += len(batch)
+            batch = []
+        job.rows_read, job.rows_imported, job.rows_failed = rows_read, rows_imported, rows_failed
+        job.bytes_read = position
+        job.errors = json.dumps(errors)
+        db.session.commit()
+        unsaved_rows = 0
+        if echo and progressed:
+            echo(f'  {rows_read:>9,} rows read, {rows_imported:,} imported, {rows_failed:,} failed')
+
+    try:
+        with open(path, 'rb') as fh, \
+                (zipfile.ZipFile(images_path) if images_path else nullcontext()) as images:
+            validate = RowValidator(job.shop_id, images)
+            for number, row in iter_rows(fh, fmt):
+                rows_read += 1
+                unsaved_rows += 1
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    batch.append(validate(row))
+                except RowError as error:
+                    rows_failed += 1
+                    if len(errors) < max_errors:
+                        errors.append({'row': number, 'field': error.field, 'message': error.message})
+                # Progress is saved at least once per batch_size rows read, even if all fail
+                if len(batch) >= batch_size or unsaved_rows >= batch_size:
+                    commit(fh.tell())
+            commit(job.bytes_total)
+    except (OSError, UnicodeDecodeError, csv.Error, zipfile.BadZipFile, SQLAlchemyError) as error:
+        db.session.rollback()
+        logger.exception('Product import %s failed', job_id)
+        job = db.session.get(ProductImport, job_id)
+        job.status = 'failed'
+        job.message = f'Import stopped after {job.rows_read:,} rows: {error}'[:255]
+    else:
+        job.status = 'done'
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def _run_in_background(app, job_id, path, images_path):
+    with app.app_context():
+        try:
+            run_import(job_id, path, images_path)
+        except Exception:
+            logger.exception('Product import %s crashed', job_id)
+            db.session.rollback()
+            job = db.session.get(ProductImport, job_id)
+            job.status, job.message, job.finished_at = 'failed', 'Unexpected error; see the server log.', datetime.utcnow()
+            db.session.commit()
+        finally:
+            db.session.remove()
+            for spooled in (path, images_path):
+                if spooled and os.path.exists(spooled):
+                    os.remove(spooled)
+
+
+def _import_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=current_app.config['IMPORT_WORKERS'],
+                                       thread_name_prefix='product-import')
+    return _executor
+
+
+def _spool(file, folder):
+    path = os.path.join(folder, f"{uuid.uuid4().hex}-{secure_filename(file.filename) or 'upload'}")
+    file.save(path)
+    return path
+
+
+def start_import(user, shop, file, images=None):
+    """Save the uploaded file (and image zip) and import it off the request thread.
+
+    Returns the queued ProductImport; its counters and status update as batches commit.
+    """
+    folder = current_app.config['IMPORT_FOLDER'] or os.path.join(current_app.instance_path, 'imports')
+    os.makedirs(folder, exist_ok=True)
+    path = _spool(file, folder)
+    images_path = _spool(images, folder) if images else None
+
+    job = ProductImport(user_id=user.id, shop_id=shop.id, filename=file.filename,
+                        bytes_total=os.path.getsize(path))
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    if current_app.config['IMPORT_ASYNC']:
+        _import_executor().submit(_run_in_background, app, job.id, path, images_path)
+    else:
+        _run_in_background(app, job.id, path, images_path)
+    return job
+
+
+def write_error_report(job, fh):
+    """Write the job's per-row errors as CSV (row, field, message) to a text file object."""
+    writer = csv.writer(fh)
+    writer.writerow(['row', 'field', 'message'])
+    for error in json.loads(job.errors or '[]'):
+        writer.writerow([error['row'], error['field'], error['message']])
+
+
+@click.command('import-products')
+@click.argument('shop_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--images', type=click.Path(exists=True, dir_okay=False), help='Zip of the images named by the rows.')
+@click.option('--format', 'fmt', type=click.Choice(sorted(set(FORMATS.values()))),
+              help='File format (default: from the extension).')
+@click.option('--report', type=click.File('w'), help='Write the per-row error report (CSV) here.')
+@with_appcontext
+def import_products_command(shop_id, path, images, fmt, report):
+    """Bulk-import products into a shop from a CSV or JSON Lines file."""
+    shop = db.session.get(Shop, shop_id)
+    if shop is None:
+        raise click.ClickException(f'Shop {shop_id} does not exist.')
+    fmt = fmt or detect_format(path)
+    if fmt is None:
+        raise click.ClickException('Cannot tell the format from the extension; pass --format.')
+
+    job = ProductImport(user_id=shop.user_id, shop_id=shop.id, filename=os.path.basename(path))
+    db.session.add(job)
+    db.session.commit()
+    click.echo(f"Importing {path} into '{shop.name}' (import #{job.id}):")
+    job = run_import(job.id, path, images, fmt, echo=click.echo)
+
+    if report is not None:
+        write_error_report(job, report)
+    for error in json.loads(job.errors or '[]')[:20]:
+        click.echo(f"  row {error['row']}: {error['message']}")
+    if job.status == 'failed':
+        raise click.ClickException(job.message)
+    click.echo(f'Imported {job.rows_imported:,} of {job.rows_read:,} rows; {job.rows_failed:,} failed.')
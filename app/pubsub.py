@@ -0,0 +1,172 @@
+# app/pubsub.py
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from app import db
+from app.models import Notification, Order, OrderItem, Shop
+
+# Live events for marketers (new notifications, order status changes), delivered over
+# Server-Sent Events. Views queue events on the session with `publish()`; they are only
+# handed to the hub once the transaction commits, so listeners never see rolled-back rows.
+# Streams are only served with NOTIFICATION_STREAM on, which needs threaded or async
+# gunicorn workers (see config.py).
+#
+# 'memory'   - in-process fan-out; right for a single worker process.
+# 'database' - every stream polls the notification/order tables, so events written by
+#              any worker reach every listener.
+
+
+def notification_event(notification):
+    return {
+        'type': 'notification',
+        'id': notification.id,
+        'message': notification.message,
+        'order_id': notification.order_id,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def order_status_event(order_id, status):
+    return {'type': 'order_status', 'order_id': order_id, 'status': status}
+
+
+class MemoryHub:
+    """Fans events out to per-listener queues held in this process."""
+
+    def __init__(self):
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def dispatch(self, user_id, payload):
+        with self._lock:
+            listeners = list(self._listeners.get(user_id, ()))
+        for listener in listeners:
+            listener.put(payload)
+
+    def listen(self, user_id, last_event_id, wait):
+        """Yield events for `user_id` (or None after `wait` seconds of silence) forever."""
+        listener = queue.Queue()
+        with self._lock:
+            self._listeners.setdefault(user_id, set()).add(listener)
+        try:
+            while True:
+                try:
+                    yield listener.get(timeout=wait)
+                except queue.Empty:
+                    yield None
+        finally:
+            with self._lock:
+                self._listeners[user_id].discard(listener)
+                if not self._listeners[user_id]:
+                    del self._listeners[user_id]
+
+
+class DatabaseHub:
+    """Polls the database for each listener; works across any number of worker processes."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def dispatch(self, user_id, payload):
+        # Nothing to do: the rows are already committed and pollers will pick them up
+        pass
+
+    def listen(self, user_id, last_event_id, wait):
+        if last_event_id is None:
+            last_event_id = db.session.query(db.func.max(Notification.id))\
+                                      .filter(Notification.user_id == user_id).scalar() or 0
+        since = datetime.utcnow()
+        shop_ids = db.select(Shop.id).where(Shop.user_id == user_id)
+        order_ids = db.select(OrderItem.order_id).where(OrderItem.shop_id.in_(shop_ids))
+        idle = 0
+        while True:
+            notifications = Notification.query.filter(Notification.user_id == user_id,
+                                                      Notification.id > last_event_id)\
+                                              .order_by(Notification.id).all()
+            orders = db.session.query(Order.id, Order.status, Order.updated_at)\
+                               .filter(Order.id.in_(order_ids), Order.updated_at > since)\
+                               .order_by(Order.updated_at).all()
+            events = [notification_event(n) for n in notifications]
+            events += [order_status_event(order_id, status) for order_id, status, _ in orders]
+            # End the read transaction so the next poll sees newly committed rows
+            db.session.rollback()
+
+            if notifications:
+                last_event_id = events[len(notifications) - 1]['id']
+            if orders:
+                since = orders[-1].updated_at
+
+            if events:
+                idle = 0
+                yield from events
+            else:
+                idle += self.interval
+                if idle >= wait:
+                    idle = 0
+                    yield None
+            time.sleep(self.interval)
+
+
+def init_app(app):
+    backend = app.config['NOTIFICATION_HUB']
+    if backend == 'memory':
+        hub = MemoryHub()
+    elif backend == 'database':
+        hub = DatabaseHub(app.config['NOTIFICATION_POLL_INTERVAL'])
+    else:
+        raise ValueError(f"Unknown NOTIFICATION_HUB {backend!r}")
+    app.extensions['notification_hub'] = hub
+
+
+def hub():
+    return current_app.extensions['notification_hub']
+
+
+def publish(user_ids, payload):
+    """Queue `payload` for the given users; it is delivered when the session commits."""
+    pending = db.session.info.setdefault('pending_events', [])
+    pending.extend((user_id, payload) for user_id in user_ids)
+
+
+def format_sse(payload):
+    lines = [f"event: {payload['type']}"]
+    if payload['type'] == 'notification':
+        lines.append(f"id: {payload['id']}")
+    lines.append(f"data: {json.dumps(payload)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream(user_id, last_event_id=None):
+    """Generate the SSE body for one listener, ending after SSE_MAX_DURATION seconds.
+
+    EventSource reconnects on its own (sending Last-Event-ID), which keeps any one
+    connection from pinning a worker indefinitely.
+    """
+    deadline = time.monotonic() + current_app.config['SSE_MAX_DURATION']
+    yield f"retry: {current_app.config['SSE_RETRY_MS']}\n\n"
+    events = hub().listen(user_id, last_event_id, current_app.config['SSE_HEARTBEAT'])
+    try:
+        for payload in events:
+            yield ': keep-alive\n\n' if payload is None else format_sse(payload)
+            if time.monotonic() > deadline:
+                break
+    finally:
+        # Unsubscribes promptly when the client disconnects
+        events.close()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _dispatch_after_commit(session):
+    pending = session.info.pop('pending_events', None)
+    if pending and has_app_context():
+        for user_id, payload in pending:
+            hub().dispatch(user_id, payload)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('pending_events', None)
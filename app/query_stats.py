@@ -0,0 +1,139 @@
+# app/query_stats.py
+import logging
+import re
+import time
+from flask import current_app, g, has_request_context, render_template, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Per-request SQL accounting. Cursor-execute hooks on the engine record every statement
+# run while a request is active: the totals go out as a Server-Timing header, the
+# breakdown by statement shape feeds the debug panel, and a shape repeated more than
+# SQL_N_PLUS_ONE_THRESHOLD times is reported as a likely N+1 (lazy loads in a loop).
+
+# Expanded IN lists ("IN (?, ?, ?)") vary with the number of ids; collapse them so the
+# same query with different list lengths counts as one shape
+_IN_LIST = re.compile(r'IN \((?:\?|%\(\w+\)s|:\w+)(?:,\s*(?:\?|%\(\w+\)s|:\w+))*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class NPlusOneError(RuntimeError):
+    """Raised when SQL_N_PLUS_ONE_ACTION is 'raise' and a statement shape repeats too often."""
+
+
+class RequestQueryStats:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}  # shape -> [count, total seconds]
+        self.reported = set()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        shape = statement_shape(statement)
+        entry = self.shapes.setdefault(shape, [0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+        return shape, entry[0]
+
+    def repeated(self, threshold):
+        """(shape, count, seconds) for shapes that ran more than `threshold` times, worst first."""
+        return sorted(((shape, count, seconds) for shape, (count, seconds) in self.shapes.items()
+                       if count > threshold), key=lambda row: -row[1])
+
+    def by_shape(self):
+        return sorted(((shape, count, seconds) for shape, (count, seconds) in self.shapes.items()),
+                      key=lambda row: (-row[1], -row[2]))
+
+
+def statement_shape(statement):
+    return _IN_LIST.sub('IN (?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def current_stats():
+    """The stats for the active request, or None outside a request / when disabled."""
+    if not has_request_context():
+        return None
+    return g.get('query_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_stats() is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, '_query_started_at', None)
+    stats = current_stats()
+    if started_at is None or stats is None:
+        return
+    duration = time.perf_counter() - started_at
+    shape, count = stats.record(statement, duration)
+
+    threshold = current_app.config['SQL_N_PLUS_ONE_THRESHOLD']
+    if threshold and count > threshold and shape not in stats.reported:
+        stats.reported.add(shape)
+        message = (f'Possible N+1 on {request.method} {request.path}: statement ran more than '
+                   f'{threshold} times: {shape}')
+        if current_app.config['SQL_N_PLUS_ONE_ACTION'] == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+def _start_request():
+    g.query_stats = RequestQueryStats()
+
+
+def _finish_request(response):
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+    if response.is_streamed:
+        # A streamed body (API lists, exports) runs its queries after this hook, so there is
+        # nothing true to put in a header yet. The stats stay on g and keep counting while
+        # stream_with_context holds the request open; metrics reads them once it closes.
+        return response
+    g.pop('query_stats')
+    app_ms = (time.perf_counter() - stats.started_at) * 1000
+    db_ms = stats.duration * 1000
+
+    if current_app.config['SQL_SERVER_TIMING']:
+        timings = [f'db;dur={db_ms:.1f};desc="{stats.count} queries"', f'app;dur={app_ms:.1f}']
+        if stats.reported:
+            timings.append('n-plus-one;desc="repeated statements"')
+        response.headers.add('Server-Timing', ', '.join(timings))
+
+    if (current_app.config['SQL_DEBUG_PANEL']
+            and response.mimetype == 'text/html'
+            and response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed):
+        body = response.get_data(as_text=True)
+        marker = body.rfind('</body>')
+        if marker != -1:
+            panel = render_template('components/sql_panel.html',
+                                    stats=stats,
+                                    app_ms=app_ms,
+                                    db_ms=db_ms,
+                                    threshold=current_app.config['SQL_N_PLUS_ONE_THRESHOLD'])
+            response.set_data(body[:marker] + panel + body[marker:])
+    return response
+
+
+def init_app(app, db):
+    """Instrument db.engine for per-request query accounting; call after db.init_app()."""
+    if app.config['SQL_DEBUG_PANEL'] is None:
+        app.config['SQL_DEBUG_PANEL'] = app.debug
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,173 @@
+# app/rollups.py
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Order, OrderItem, Shop, ShopDailyStats
+
+# shop_daily_stats holds, per shop and per day the order was placed: the number of orders
+# and the units and revenue they contain (cancelled orders excluded), plus how many of
+# those orders are still Pending. Rows are adjusted with upserts in the same transaction
+# as the order write; `rebuild_shop_daily_stats` recomputes everything from OrderItem.
+
+TREND_DAYS = 14
+
+
+def _counts_as_sale(status):
+    return status is not None and status != 'Cancelled'
+
+
+def _is_pending(status):
+    return status == 'Pending'
+
+
+_ROLLUP_COLUMNS = ('orders', 'units', 'revenue', 'pending_orders')
+
+
+def _upsert_insert():
+    # Imported here: the postgresql dialect is slow to import and SQLite deployments never use it
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def _upsert(rows):
+    if not rows:
+        return
+    insert = _upsert_insert()
+    if insert is not None:
+        stmt = insert(ShopDailyStats)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ShopDailyStats.shop_id, ShopDailyStats.day],
+            set_={
+                column: getattr(ShopDailyStats, column) + getattr(stmt.excluded, column)
+                for column in _ROLLUP_COLUMNS
+            },
+        )
+        db.session.execute(stmt, rows)
+        return
+    # Other dialects: add to the existing row, inserting it when there is none yet
+    for row in rows:
+        if not _increment(row):
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(ShopDailyStats).values(**row))
+            except IntegrityError:
+                # Another transaction created the row first
+                _increment(row)
+
+
+def _increment(row):
+    return ShopDailyStats.query.filter_by(shop_id=row['shop_id'], day=row['day'])\
+                               .update({getattr(ShopDailyStats, column): getattr(ShopDailyStats, column) + row[column]
+                                        for column in _ROLLUP_COLUMNS},
+                                       synchronize_session=False) > 0
+
+
+def record_status_change(order, lines, old_status, new_status):
+    """Adjust the rollup for `order` moving from `old_status` to `new_status`.
+
+    `lines` are (shop_id, quantity, price) tuples for the order; `old_status` is None for
+    a newly placed order. The caller commits.
+    """
+    sale_delta = int(_counts_as_sale(new_status)) - int(_counts_as_sale(old_status))
+    pending_delta = int(_is_pending(new_status)) - int(_is_pending(old_status))
+    if not sale_delta and not pending_delta:
+        return
+
+    per_shop = defaultdict(lambda: [0, 0.0])
+    for shop_id, quantity, price in lines:
+        per_shop[shop_id][0] += quantity
+        per_shop[shop_id][1] += quantity * price
+
+    day = (order.created_at or datetime.utcnow()).date()
+    _upsert([
+        {
+            'shop_id': shop_id,
+            'day': day,
+            'orders': sale_delta,
+            'units': sale_delta * units,
+            'revenue': sale_delta * revenue,
+            'pending_orders': pending_delta,
+        }
+        for shop_id, (units, revenue) in sorted(per_shop.items())
+    ])
+
+
+def order_lines(order_id):
+    return db.session.query(OrderItem.shop_id, OrderItem.quantity, OrderItem.price_at_purchase)\
+                     .filter(OrderItem.order_id == order_id).all()
+
+
+def shop_sales_summary(user_id, days=TREND_DAYS):
+    """Lifetime KPIs plus a per-day trend for the last `days` days across a marketer's shops.
+
+    One grouped query: rows older than the trend window collapse into a single bucket.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    bucket = case((ShopDailyStats.day >= since, ShopDailyStats.day), else_=None)
+    rows = db.session.query(bucket,
+                            func.sum(ShopDailyStats.orders),
+                            func.sum(ShopDailyStats.units),
+                            func.sum(ShopDailyStats.revenue),
+                            func.sum(ShopDailyStats.pending_orders))\
+                     .join(Shop, Shop.id == ShopDailyStats.shop_id)\
+                     .filter(Shop.user_id == user_id)\
+                     .group_by(bucket).all()
+
+    totals = {'orders': 0, 'units': 0, 'revenue': 0.0, 'pending_orders': 0}
+    by_day = {}
+    for day, orders, units, revenue, pending in rows:
+        totals['orders'] += orders or 0
+        totals['units'] += units or 0
+        totals['revenue'] += revenue or 0
+        totals['pending_orders'] += pending or 0
+        if day is not None:
+            # SQLite hands back the CASE result as text
+            by_day[day if isinstance(day, date) else date.fromisoformat(day)] = (orders or 0, revenue or 0)
+
+    trend = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        orders, revenue = by_day.get(day, (0, 0.0))
+        trend.append({'day': day, 'orders': orders, 'revenue': revenue})
+    return totals, trend
+
+
+def rebuild_shop_daily_stats():
+    """Recompute the whole rollup from Order/OrderItem."""
+    not_cancelled = Order.status != 'Cancelled'
+    day = func.date(Order.created_at)
+    rows = db.session.query(
+        OrderItem.shop_id,
+        day,
+        func.count(func.distinct(case((not_cancelled, Order.id)))),
+        func.coalesce(func.sum(case((not_cancelled, OrderItem.quantity), else_=0)), 0),
+        func.coalesce(func.sum(case((not_cancelled, OrderItem.quantity * OrderItem.price_at_purchase),
+                                    else_=0)), 0),
+        func.count(func.distinct(case((Order.status == 'Pending', Order.id)))),
+    ).join(Order, Order.id == OrderItem.order_id)\
+     .filter(OrderItem.shop_id.isnot(None), Order.created_at.isnot(None))\
+     .group_by(OrderItem.shop_id, day).all()
+
+    db.session.execute(db.delete(ShopDailyStats))
+    if rows:
+        db.session.execute(db.insert(ShopDailyStats), [
+            {
+                'shop_id': shop_id,
+                'day': row_day if isinstance(row_day, date) else date.fromisoformat(row_day),
+                'orders': orders,
+                'units': units,
+                'revenue': revenue,
+                'pending_orders': pending,
+            }
+            for shop_id, row_day, orders, units, revenue, pending in rows
+        ])
+    db.session.commit()
+    return len(rows)
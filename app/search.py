@@ -0,0 +1,236 @@
+# app/search.py
+import re
+from sqlalchemy import event, false, inspect
+from app import db
+from app.models import Product, Shop, Category
+
+# Full-text search over the catalog. SQLite uses FTS5 virtual tables keyed by rowid
+# (= product/shop id) and ranks with bm25(); PostgreSQL keeps a tsvector per row in a
+# GIN-indexed table and ranks with ts_rank_cd(). Other dialects fall back to ILIKE.
+
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5("
+    "name, description, shop_name, category, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS shop_search USING fts5("
+    "name, description, location, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+]
+
+POSTGRES_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS product_search (rowid INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_product_search_document ON product_search USING GIN (document)",
+    "CREATE TABLE IF NOT EXISTS shop_search (rowid INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_shop_search_document ON shop_search USING GIN (document)",
+]
+
+_PRODUCT_SOURCE = (
+    "FROM product "
+    "LEFT JOIN shop ON shop.id = product.shop_id "
+    "LEFT JOIN category ON category.id = product.category_id "
+)
+
+SQLITE_INSERT = {
+    'product': "INSERT INTO product_search (rowid, name, description, shop_name, category) "
+               "SELECT product.id, product.name, COALESCE(product.description, ''), "
+               "COALESCE(shop.name, ''), COALESCE(category.name, '') " + _PRODUCT_SOURCE,
+    'shop': "INSERT INTO shop_search (rowid, name, description, location) "
+            "SELECT shop.id, shop.name, COALESCE(shop.description, ''), COALESCE(shop.location, '') "
+            "FROM shop ",
+}
+
+POSTGRES_INSERT = {
+    'product': "INSERT INTO product_search (rowid, document) "
+               "SELECT product.id, "
+               "setweight(to_tsvector('simple', product.name), 'A') || "
+               "setweight(to_tsvector('simple', COALESCE(category.name, '')), 'B') || "
+               "setweight(to_tsvector('simple', COALESCE(shop.name, '')), 'B') || "
+               "setweight(to_tsvector('simple', COALESCE(product.description, '')), 'C') " + _PRODUCT_SOURCE,
+    'shop': "INSERT INTO shop_search (rowid, document) "
+            "SELECT shop.id, "
+            "setweight(to_tsvector('simple', shop.name), 'A') || "
+            "setweight(to_tsvector('simple', COALESCE(shop.location, '')), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(shop.description, '')), 'C') "
+            "FROM shop ",
+}
+
+# bm25() returns lower-is-better scores; column weights favour names over descriptions
+SQLITE_MATCH = {
+    'product': "SELECT rowid AS ref_id, bm25(product_search, 10.0, 1.0, 4.0, 4.0) AS rank "
+               "FROM product_search WHERE product_search MATCH :q",
+    'shop': "SELECT rowid AS ref_id, bm25(shop_search, 10.0, 1.0, 4.0) AS rank "
+            "FROM shop_search WHERE shop_search MATCH :q",
+}
+
+POSTGRES_MATCH = {
+    kind: f"SELECT rowid AS ref_id, -ts_rank_cd(document, to_tsquery('simple', :q)) AS rank "
+          f"FROM {kind}_search WHERE document @@ to_tsquery('simple', :q)"
+    for kind in ('product', 'shop')
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _dialect(bind=None):
+    bind = bind if bind is not None else db.engine
+    return bind.dialect.name
+
+
+def is_enabled(bind=None):
+    return _dialect(bind) in ('sqlite', 'postgresql')
+
+
+def _match_expression(text, dialect):
+    # Quote every token so user input can't inject query syntax, and prefix-match the terms
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    if dialect == 'postgresql':
+        return ' & '.join(f"{token}:*" for token in tokens)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _create_tables(conn):
+    if not is_enabled(conn):
+        return
+    schema = POSTGRES_SCHEMA if conn.dialect.name == 'postgresql' else SQLITE_SCHEMA
+    for statement in schema:
+        conn.execute(db.text(statement))
+
+
+def create_index(bind=None):
+    """Create the search tables if they don't exist yet (idempotent)."""
+    bind = bind if bind is not None else db.engine
+    with bind.begin() as conn:
+        _create_tables(conn)
+
+
+# The catalog write hooks below need the search tables, so any schema built with
+# db.create_all() gets them too (and db.drop_all() removes them)
+@event.listens_for(db.metadata, 'after_create')
+def _create_with_schema(target, connection, **kw):
+    _create_tables(connection)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _drop_with_schema(target, connection, **kw):
+    if is_enabled(connection):
+        for kind in ('product', 'shop'):
+            connection.execute(db.text(f"DROP TABLE IF EXISTS {kind}_search"))
+
+
+def _reindex(conn, kind, ids=None):
+    inserts = POSTGRES_INSERT if conn.dialect.name == 'postgresql' else SQLITE_INSERT
+    if ids is None:
+        conn.execute(db.text(f"DELETE FROM {kind}_search"))
+        conn.execute(db.text(inserts[kind]))
+        return
+    ids = sorted(ids)
+    if not ids:
+        return
+    params = {f'id{i}': ref_id for i, ref_id in enumerate(ids)}
+    placeholders = ', '.join(f':{name}' for name in params)
+    conn.execute(db.text(f"DELETE FROM {kind}_search WHERE rowid IN ({placeholders})"), params)
+    conn.execute(db.text(f"{inserts[kind]}WHERE {kind}.id IN ({placeholders})"), params)
+
+
+def rebuild_index():
+    """Drop and repopulate every search row from the catalog tables."""
+    create_index()
+    with db.engine.begin() as conn:
+        _reindex(conn, 'product')
+        _reindex(conn, 'shop')
+
+
+def index_products(product_ids):
+    """Index products written with bulk INSERTs, which the flush listener never sees.
+
+    Runs on the session's connection, so the rows commit with the products."""
+    conn = db.session.connection()
+    if is_enabled(conn):
+        _reindex(conn, 'product', product_ids)
+
+
+def search_subquery(kind, text):
+    """Return a (ref_id, rank) subquery of matches ordered best-first by ascending rank,
+    or None when the text has no searchable terms."""
+    dialect = _dialect()
+    expression = _match_expression(text, dialect)
+    if expression is None:
+        return None
+    statements = POSTGRES_MATCH if dialect == 'postgresql' else SQLITE_MATCH
+    return (db.text(statements[kind])
+            .bindparams(q=expression)
+            .columns(ref_id=db.Integer, rank=db.Float)
+            .subquery(f'{kind}_matches'))
+
+
+def filter_products(query, text):
+    """Restrict a Product query to full-text matches; returns (query, rank column)."""
+    if not is_enabled():
+        return query.filter(Product.name.ilike(f'%{text}%')), None
+    matches = search_subquery('product', text)
+    if matches is None:
+        # Text without a single searchable term (e.g. only punctuation) matches nothing
+        return query.filter(false()), None
+    return query.join(matches, matches.c.ref_id == Product.id), matches.c.rank
+
+
+def filter_shops(query, text):
+    """Restrict a Shop query to full-text matches; returns (query, rank column)."""
+    if not is_enabled():
+        return query.filter(Shop.name.ilike(f'%{text}%')), None
+    matches = search_subquery('shop', text)
+    if matches is None:
+        # Text without a single searchable term (e.g. only punctuation) matches nothing
+        return query.filter(false()), None
+    return query.join(matches, matches.c.ref_id == Shop.id), matches.c.rank
+
+
+PRODUCT_FIELDS = ('name', 'description', 'shop_id', 'category_id')
+SHOP_FIELDS = ('name', 'description', 'location')
+
+
+def _changed(session, obj, fields):
+    if obj in session.new or obj in session.deleted:
+        return True
+    attrs = inspect(obj).attrs
+    return any(attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    # Runs inside the flushing transaction, so index rows commit or roll back with the catalog
+    conn = session.connection()
+    if not is_enabled(conn):
+        return
+
+    product_ids, shop_ids = set(), set()
+    reindex_shop_products, reindex_category_products = set(), set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Product):
+            if _changed(session, obj, PRODUCT_FIELDS):
+                product_ids.add(obj.id)
+        elif isinstance(obj, Shop):
+            if _changed(session, obj, SHOP_FIELDS):
+                shop_ids.add(obj.id)
+            if obj in session.deleted or _changed(session, obj, ('name',)):
+                reindex_shop_products.add(obj.id)
+        elif isinstance(obj, Category) and obj not in session.new:
+            if obj in session.deleted or _changed(session, obj, ('name',)):
+                reindex_category_products.add(obj.id)
+
+    if reindex_shop_products or reindex_category_products:
+        rows = session.execute(
+            db.select(Product.id).where(db.or_(
+                Product.shop_id.in_(reindex_shop_products),
+                Product.category_id.in_(reindex_category_products),
+            ))
+        )
+        product_ids.update(row[0] for row in rows)
+
+    product_ids.discard(None)
+    shop_ids.discard(None)
+    _reindex(conn, 'product', product_ids)
+    _reindex(conn, 'shop', shop_ids)
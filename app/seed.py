@@ -0,0 +1,224 @@
+# app/seed.py
+import random
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from werkzeug.security import generate_password_hash
+from app import db, rollups, search
+from app.models import (User, Shop, Category, Product, Rating, Order, OrderItem, Notification,
+                        recompute_rating_aggregates, recompute_unread_notifications,
+                        bump_category_version)
+
+# Synthetic marketplace data at production-like volumes. Everything is drawn from one
+# seeded RNG and rows get explicit ids (continuing after the current max id), so the same
+# options on the same starting database produce the same data; timestamps are spread
+# over the `days` before today. Rows go in with multi-row Core INSERTs in batches, then
+# the derived data (rating aggregates, unread counters, sales rollup, search index) is
+# rebuilt in one pass each.
+
+SEED_PASSWORD = 'password'
+
+WORDS = ('ankara', 'adire', 'aso-oke', 'beads', 'waist', 'coral', 'leather', 'sandals', 'kaftan',
+         'agbada', 'gele', 'shea', 'butter', 'black', 'soap', 'palm', 'wine', 'pepper', 'suya',
+         'spice', 'calabash', 'bronze', 'mask', 'woven', 'basket', 'raffia', 'bag', 'clutch',
+         'silk', 'lace', 'cotton', 'indigo', 'print', 'earrings', 'bangle', 'necklace', 'perfume',
+         'oil', 'hair', 'wig', 'braids', 'kente', 'dashiki', 'slippers', 'cap', 'fila', 'wrapper')
+LOCATIONS = ('Lagos', 'Abuja', 'Ibadan', 'Kano', 'Port Harcourt', 'Enugu', 'Benin City', 'Jos',
+             'Abeokuta', 'Kaduna', 'Owerri', 'Calabar')
+CATEGORY_NAMES = ('Clothing', 'Jewelry', 'Beauty', 'Home', 'Food', 'Accessories', 'Footwear',
+                  'Art', 'Hair', 'Bags', 'Fabrics', 'Gifts')
+ORDER_STATUSES = ('Pending', 'Processing', 'Shipped', 'Delivered', 'Delivered', 'Delivered', 'Cancelled')
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _insert(model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(db.insert(model), rows[start:start + batch_size])
+        db.session.commit()
+
+
+def _sync_sequences(models):
+    # Explicit ids don't advance PostgreSQL's serial sequences
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__table__.name
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))"
+        ))
+    db.session.commit()
+
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate(customers=2000, marketers=100, shops_per_marketer=2, categories_per_shop=5,
+             products=20000, ratings=100000, orders=20000, max_items_per_order=4,
+             notifications=20000, days=90, seed=1, batch_size=5000, echo=None):
+    """Insert a synthetic dataset and return {table: rows inserted}."""
+    echo = echo or (lambda message: None)
+    rng = random.Random(seed)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def timestamp():
+        return today - timedelta(seconds=rng.randrange(days * 86400))
+
+    counts = {}
+    password_hash = generate_password_hash(SEED_PASSWORD)  # hashed once, shared by every seeded user
+
+    # Users
+    first_user = _next_id(User)
+    tag = f'seed{seed}-{first_user}'
+    marketer_ids = list(range(first_user, first_user + marketers))
+    customer_ids = list(range(first_user + marketers, first_user + marketers + customers))
+    user_rows = [{'id': user_id, 'username': f'{tag}-marketer{i}', 'email': f'{tag}-marketer{i}@seed.local',
+                  'password_hash': password_hash, 'role': 'marketer', 'is_approved': rng.random() < 0.9,
+                  'created_at': timestamp()}
+                 for i, user_id in enumerate(marketer_ids)]
+    user_rows += [{'id': user_id, 'username': f'{tag}-customer{i}', 'email': f'{tag}-customer{i}@seed.local',
+                   'password_hash': password_hash, 'role': 'customer', 'is_approved': True,
+                   'created_at': timestamp()}
+                  for i, user_id in enumerate(customer_ids)]
+    _insert(User, user_rows, batch_size)
+    counts['user'] = len(user_rows)
+    echo(f'  users          {len(user_rows):>9,}')
+
+    # Shops and their categories
+    next_shop = _next_id(Shop)
+    shop_rows = []
+    for marketer_id in marketer_ids:
+        for i in range(shops_per_marketer):
+            shop_rows.append({'id': next_shop, 'name': f'{_phrase(rng, 2).title()} {next_shop}',
+                              'description': _phrase(rng, 12), 'location': rng.choice(LOCATIONS),
+                              'whatsapp_number': f'080{rng.randrange(10 ** 8):08d}',
+                              'user_id': marketer_id, 'created_at': timestamp()})
+            next_shop += 1
+    _insert(Shop, shop_rows, batch_size)
+    counts['shop'] = len(shop_rows)
+
+    next_category = _next_id(Category)
+    category_rows = []
+    categories_by_shop = {}
+    for shop in shop_rows:
+        names = rng.sample(CATEGORY_NAMES, min(categories_per_shop, len(CATEGORY_NAMES)))
+        categories_by_shop[shop['id']] = list(range(next_category, next_category + len(names)))
+        for name in names:
+            category_rows.append({'id': next_category, 'name': name, 'shop_id': shop['id']})
+            next_category += 1
+    _insert(Category, category_rows, batch_size)
+    counts['category'] = len(category_rows)
+    echo(f'  shops          {len(shop_rows):>9,}  categories {len(category_rows):,}')
+
+    # Products
+    next_product = _next_id(Product)
+    product_rows = []
+    for _ in range(products if shop_rows else 0):
+        shop = rng.choice(shop_rows)
+        shop_categories = categories_by_shop[shop['id']]
+        product_rows.append({'id': next_product, 'name': _phrase(rng, 3).title(),
+                             'description': _phrase(rng, 20),
+                             'price': round(rng.uniform(500, 150000), 2),
+                             'is_active': rng.random() < 0.95, 'shop_id': shop['id'],
+                             'category_id': rng.choice(shop_categories) if shop_categories and rng.random() < 0.85 else None,
+                             'created_at': timestamp()})
+        next_product += 1
+    _insert(Product, product_rows, batch_size)
+    counts['product'] = len(product_rows)
+    echo(f'  products       {len(product_rows):>9,}')
+
+    # Ratings: distinct (product, customer) pairs, matching the unique rating index
+    if product_rows and customer_ids:
+        ratings = min(ratings, len(product_rows) * len(customer_ids))
+        next_rating = _next_id(Rating)
+        pairs = rng.sample(range(len(product_rows) * len(customer_ids)), ratings)
+        for start in range(0, len(pairs), batch_size):
+            rows = []
+            for pair in pairs[start:start + batch_size]:
+                product = product_rows[pair // len(customer_ids)]
+                rows.append({'id': next_rating, 'value': rng.choices((1, 2, 3, 4, 5), (1, 1, 3, 6, 8))[0],
+                             'comment': _phrase(rng, 8) if rng.random() < 0.2 else None,
+                             'product_id': product['id'], 'user_id': customer_ids[pair % len(customer_ids)],
+                             'shop_id': product['shop_id'], 'created_at': timestamp()})
+                next_rating += 1
+            db.session.execute(db.insert(Rating), rows)
+            db.session.commit()
+        counts['rating'] = ratings
+        echo(f'  ratings        {ratings:>9,}')
+
+    # Orders and their lines
+    if product_rows and customer_ids:
+        next_order = _next_id(Order)
+        next_item = _next_id(OrderItem)
+        for start in range(0, orders, batch_size):
+            order_rows, item_rows = [], []
+            for _ in range(min(batch_size, orders - start)):
+                created_at = timestamp()
+                total = 0.0
+                for product in rng.sample(product_rows, min(rng.randint(1, max_items_per_order), len(product_rows))):
+                    quantity = rng.randint(1, 3)
+                    total += quantity * product['price']
+                    item_rows.append({'id': next_item, 'order_id': next_order, 'product_id': product['id'],
+                                      'shop_id': product['shop_id'], 'quantity': quantity,
+                                      'price_at_purchase': product['price']})
+                    next_item += 1
+                order_rows.append({'id': next_order, 'user_id': rng.choice(customer_ids),
+                                   'total_price': round(total, 2), 'status': rng.choice(ORDER_STATUSES),
+                                   'created_at': created_at, 'updated_at': created_at})
+                next_order += 1
+            db.session.execute(db.insert(Order), order_rows)
+            db.session.execute(db.insert(OrderItem), item_rows)
+            db.session.commit()
+            counts['order'] = counts.get('order', 0) + len(order_rows)
+            counts['order_item'] = counts.get('order_item', 0) + len(item_rows)
+        echo(f"  orders         {counts.get('order', 0):>9,}  items {counts.get('order_item', 0):,}")
+
+    # Notifications for marketers
+    if marketer_ids:
+        next_notification = _next_id(Notification)
+        notification_rows = [{'id': next_notification + i, 'user_id': rng.choice(marketer_ids),
+                              'message': f'New order received for {_phrase(rng, 3)}',
+                              'is_read': rng.random() < 0.7, 'created_at': timestamp()}
+                             for i in range(notifications)]
+        _insert(Notification, notification_rows, batch_size)
+        counts['notification'] = len(notification_rows)
+        echo(f'  notifications  {len(notification_rows):>9,}')
+
+    _sync_sequences([User, Shop, Category, Product, Rating, Order, OrderItem, Notification])
+
+    # Derived data, rebuilt once instead of maintained row by row
+    recompute_rating_aggregates()
+    recompute_unread_notifications()
+    rollups.rebuild_shop_daily_stats()
+    search.rebuild_index()
+    bump_category_version()
+    return counts
+
+
+@click.command('seed')
+@click.option('--customers', default=2000, show_default=True)
+@click.option('--marketers', default=100, show_default=True)
+@click.option('--shops-per-marketer', default=2, show_default=True)
+@click.option('--categories-per-shop', default=5, show_default=True)
+@click.option('--products', default=20000, show_default=True)
+@click.option('--ratings', default=100000, show_default=True)
+@click.option('--orders', default=20000, show_default=True)
+@click.option('--max-items-per-order', default=4, show_default=True)
+@click.option('--notifications', default=20000, show_default=True)
+@click.option('--days', default=90, show_default=True, help='Spread timestamps over this many past days.')
+@click.option('--seed', default=1, show_default=True, help='Random seed; same seed, same data.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per INSERT batch.')
+@with_appcontext
+def seed_command(**options):
+    """Generate a synthetic marketplace dataset for local performance work."""
+    started = time.perf_counter()
+    click.echo('Seeding:')
+    generate(echo=click.echo, **options)
+    click.echo(f'Done in {time.perf_counter() - started:.1f}s. Seeded users log in with password '
+               f'"{SEED_PASSWORD}".')
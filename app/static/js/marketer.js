@@ -9,6 +9,73 @@ document.addEventListener('DOMContentLoaded', function() {
     const categorySelectProductForm = document.getElementById('category_id'); // For create_product.html and edit_product.html
     const categorySelectShopProducts = document.getElementById('category_id_product_form'); // For shop_products.html
 
+    // Category choices for all of the marketer's shops come from one endpoint. The last
+    // response is kept in sessionStorage with its ETag, so later page loads only
+    // revalidate it (a 304 with no body) until a category or shop changes.
+    const CATEGORY_CACHE_KEY = 'marketerCategories';
+    let marketerCategories = null;
+
+    function readCachedCategories() {
+        try {
+            return JSON.parse(sessionStorage.getItem(CATEGORY_CACHE_KEY));
+        } catch (error) {
+            return null;
+        }
+    }
+
+    function loadMarketerCategories() {
+        if (marketerCategories) {
+            return marketerCategories;
+        }
+        const cached = readCachedCategories();
+        const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+        if (cached && cached.etag) {
+            headers['If-None-Match'] = cached.etag;
+        }
+        marketerCategories = fetch('/marketer/categories', { method: 'GET', headers: headers })
+            .then(response => {
+                if (response.status === 304 && cached) {
+                    return cached.data;
+                }
+                if (!response.ok) {
+                    throw new Error('Network response was not ok: ' + response.statusText);
+                }
+                return response.json().then(data => {
+                    try {
+                        sessionStorage.setItem(CATEGORY_CACHE_KEY,
+                            JSON.stringify({ etag: response.headers.get('ETag'), data: data }));
+                    } catch (error) {
+                        // Storage full or disabled: the browser's HTTP cache still revalidates
+                    }
+                    return data;
+                });
+            });
+        return marketerCategories;
+    }
+
+    function fetchShopCategories(shopId) {
+        return loadMarketerCategories()
+            .then(data => data.shops[shopId] || null)
+            .catch(() => null)
+            .then(categories => {
+                if (categories) {
+                    return categories;
+                }
+                // Not one of the current user's shops (an admin editing a product)
+                return fetch(`/marketer/categories_by_shop/${shopId}`, {
+                    method: 'GET',
+                    headers: { 'X-Requested-With': 'XMLHttpRequest' }
+                })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error('Network response was not ok: ' + response.statusText);
+                    }
+                    return response.json();
+                })
+                .then(data => data.categories);
+            });
+    }
+
     // Function to fetch and populate category choices for a given shop and target select element
     function fetchAndPopulateCategoryChoices(shopId, targetCategorySelect, initialSelectedValue = null) {
         if (!shopId) {
@@ -16,29 +83,16 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        fetch(`/marketer/categories_by_shop/${shopId}`, {
-            method: 'GET',
-            headers: {
-                'X-Requested-With': 'XMLHttpRequest',
-            }
-        })
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Network response was not ok: ' + response.statusText);
-            }
-            return response.json();
-        })
-        .then(data => {
-            console.log('Received category data:', data);
-
+        fetchShopCategories(shopId)
+        .then(categories => {
             targetCategorySelect.innerHTML = '';
             const defaultOption = document.createElement('option');
             defaultOption.value = '';
             defaultOption.textContent = 'Select a category';
             targetCategorySelect.appendChild(defaultOption);
 
-            if (data.categories && data.categories.length > 0) {
-                data.categories.forEach(category => {
+            if (categories && categories.length > 0) {
+                categories.forEach(category => {
                     const option = document.createElement('option');
                     option.value = category.id;
                     option.textContent = category.name;
@@ -83,4 +137,49 @@ document.addEventListener('DOMContentLoaded', function() {
             fetchAndPopulateCategoryChoices(currentShopId, categorySelectShopProducts, initialCategoryValue);
         }
     }
+
+    // Live notifications: the server pushes new notifications and order status changes
+    // over Server-Sent Events, so marketers no longer need to keep refreshing pages.
+    const streamUrl = document.body.dataset.notificationStream;
+    if (streamUrl && window.EventSource) {
+        const source = new EventSource(streamUrl);
+        const badge = document.getElementById('notification-badge');
+        const unreadCount = document.getElementById('unread-notification-count');
+        const liveList = document.getElementById('live-notifications');
+
+        source.addEventListener('notification', function(event) {
+            const notification = JSON.parse(event.data);
+
+            if (badge) {
+                badge.textContent = (parseInt(badge.textContent, 10) || 0) + 1;
+                badge.classList.remove('hidden');
+            }
+            if (unreadCount) {
+                unreadCount.textContent = (parseInt(unreadCount.textContent, 10) || 0) + 1;
+            }
+            if (liveList) {
+                const item = document.createElement('div');
+                item.className = 'border border-indigo-200 p-4 rounded-md shadow-sm bg-indigo-50';
+                const message = document.createElement('p');
+                message.className = 'text-indigo-800 font-medium';
+                message.textContent = notification.message;
+                item.appendChild(message);
+                if (notification.order_id) {
+                    const link = document.createElement('a');
+                    link.href = `/marketer/orders/${notification.order_id}`;
+                    link.className = 'text-indigo-600 text-xs mt-1 inline-block hover:underline';
+                    link.textContent = `View Order #${notification.order_id}`;
+                    item.appendChild(link);
+                }
+                liveList.prepend(item);
+            }
+        });
+
+        source.addEventListener('order_status', function(event) {
+            const update = JSON.parse(event.data);
+            document.querySelectorAll(`[data-order-status="${update.order_id}"]`).forEach(element => {
+                element.textContent = update.status;
+            });
+        });
+    }
 });
@@ -0,0 +1,157 @@
+# app/user_cache.py
+import threading
+import time
+from flask import current_app, has_app_context, has_request_context, request, session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.models import User
+
+# Process-local cache of the logged-in user's row for Flask-Login's user_loader. Entries
+# are keyed on user id plus a version stamp kept in that user's session. Committed writes
+# to a User row (profile edits, password changes, admin edits, approval, deletion) evict
+# it in this process, and when the user changed their own row the stamp in their session
+# is bumped, so every worker misses on their next request. Writes made by someone else
+# (an admin approving, demoting or deleting a user) can only be evicted in the process
+# that made them, so the cache is limited to requests where a stale row can't grant
+# anything: GET/HEAD on the storefront. Every write, and every admin and marketer page
+# (where role and approval are checked), loads the row from the database, so those
+# changes take effect immediately; storefront pages catch up within USER_CACHE_TTL.
+
+# The unread counter changes on every new order; leave it to load on access (marketers' navbar)
+UNCACHED_COLUMNS = {'unread_notifications'}
+
+CACHED_BLUEPRINTS = {'customer'}
+CACHED_METHODS = {'GET', 'HEAD'}
+
+SESSION_KEY = 'user_version'
+
+
+class UserCache:
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # user id -> (stamp, expires_at, column values)
+        self._lock = threading.Lock()
+
+    def get(self, user_id, stamp):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        entry_stamp, expires_at, values = entry
+        if entry_stamp != stamp or expires_at < time.monotonic():
+            return None
+        return values
+
+    def set(self, user_id, stamp, values):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (stamp, time.monotonic() + self.ttl, values)
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_app(app):
+    enabled = app.config['USER_CACHE_ENABLED']
+    app.extensions['user_cache'] = UserCache(app.config['USER_CACHE_TTL'],
+                                             app.config['USER_CACHE_MAX_ENTRIES']) if enabled else None
+
+
+def _cache():
+    return current_app.extensions.get('user_cache') if has_app_context() else None
+
+
+def _columns():
+    return [attr.key for attr in inspect(User).column_attrs if attr.key not in UNCACHED_COLUMNS]
+
+
+def _cacheable_request():
+    return has_request_context() and request.method in CACHED_METHODS \
+        and request.blueprint in CACHED_BLUEPRINTS
+
+
+def load_user(user_id):
+    """The User for `user_id`, attached to the current session, without a query on a cache hit."""
+    cache = _cache()
+    if cache is None or not _cacheable_request():
+        return db.session.get(User, user_id)
+
+    stamp = session.get(SESSION_KEY, 0)
+    values = cache.get(user_id, stamp)
+    if values is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            cache.set(user_id, stamp, {key: getattr(user, key) for key in _columns()})
+        return user
+
+    # Rebuild the row as a detached instance and attach it without loading; relationships
+    # and the uncached columns still load lazily through the request's session
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def bump_session_version():
+    session[SESSION_KEY] = session.get(SESSION_KEY, 0) + 1
+
+
+def _cached_columns_changed(user):
+    state = inspect(user)
+    return any(state.attrs[key].history.has_changes() for key in _columns())
+
+
+def _bulk_touches_cached_columns(statement):
+    values = getattr(statement, '_values', None)
+    if not values:
+        return True  # DELETE, or per-row parameters we can't see: assume it does
+    return bool({getattr(column, 'key', column) for column in values} - UNCACHED_COLUMNS)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_user_writes(session_, flush_context):
+    changed = {obj.id for obj in session_.dirty if isinstance(obj, User) and _cached_columns_changed(obj)}
+    changed |= {obj.id for obj in session_.deleted if isinstance(obj, User)}
+    if changed:
+        session_.info.setdefault('stale_user_ids', set()).update(changed)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _track_bulk_user_writes(orm_execute_state):
+    # Bulk UPDATE/DELETE bypass the flush; drop everything unless only the unread counter moved
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is User \
+            and _bulk_touches_cached_columns(orm_execute_state.statement):
+        orm_execute_state.session.info['stale_users_all'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session_):
+    stale_ids = session_.info.pop('stale_user_ids', set())
+    stale_all = session_.info.pop('stale_users_all', False)
+    if not (stale_ids or stale_all):
+        return
+    cache = _cache()
+    if cache is not None:
+        if stale_all:
+            cache.clear()
+        else:
+            cache.invalidate(stale_ids)
+    # The user changed their own row: a new stamp makes every worker reload it
+    if has_request_context() and session.get('_user_id') \
+            and (stale_all or int(session['_user_id']) in stale_ids):
+        bump_session_version()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session_):
+    session_.info.pop('stale_user_ids', None)
+    session_.info.pop('stale_users_all', None)
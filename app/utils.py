@@ -1,7 +1,42 @@
 # app/utils.py
+import base64
+import io
+import json
+import logging
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
-from flask import current_app
+from flask import current_app, url_for
+
+logger = logging.getLogger(__name__)
+
+# Fixed-width variants generated for every upload, smallest first
+IMAGE_VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'detail': 1080,
+}
+PLACEHOLDER_WIDTH = 16
+
+_executor = None
+_manifests = {}
+
+
+def _image_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=current_app.config['IMAGE_WORKERS'],
+                                       thread_name_prefix='image-pipeline')
+    return _executor
+
+
+def unique_filename(filename):
+    # Keep a readable stem but make every stored name unique so uploads never overwrite
+    stem, ext = os.path.splitext(secure_filename(filename))
+    stem = (stem or 'image')[:40]
+    return f"{stem}-{uuid.uuid4().hex[:12]}{ext.lower()}"
+
 
 def save_image(file):
     if file:
@@ -10,8 +45,113 @@ def save_image(file):
         if not os.path.exists(upload_folder):
             os.makedirs(upload_folder) # This creates the directory if missing
 
-        filename = secure_filename(file.filename)
+        filename = unique_filename(file.filename)
         filepath = os.path.join(upload_folder, filename)
         file.save(filepath) # This saves the FileStorage object to disk
+
+        # Resizing happens off the request thread; templates fall back to the original
+        # file until the variant manifest appears
+        if current_app.config['IMAGE_PROCESS_ASYNC']:
+            _image_executor().submit(process_image, upload_folder, filename)
+        else:
+            process_image(upload_folder, filename)
         return filename # This MUST return ONLY the filename string
-    return None
\ No newline at end of file
+    return None
+
+
+def _variant_name(filename, variant, fmt):
+    return f"{os.path.splitext(filename)[0]}_{variant}.{fmt}"
+
+
+def _manifest_path(upload_folder, filename):
+    return os.path.join(upload_folder, f"{os.path.splitext(filename)[0]}.variants.json")
+
+
+def process_image(upload_folder, filename):
+    """Write WebP and JPEG variants plus a tiny inline placeholder for an uploaded image.
+
+    Returns True when a manifest was written. Failures are logged rather than raised
+    because this normally runs on a worker thread.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        logger.warning('Pillow is not installed; serving %s without resized variants', filename)
+        return False
+
+    source = os.path.join(upload_folder, filename)
+    try:
+        with Image.open(source) as original:
+            # Pillow only warns between MAX_IMAGE_PIXELS and twice that (and raises beyond);
+            # refuse both before decoding, as a decompression bomb would exhaust memory
+            limit = Image.MAX_IMAGE_PIXELS
+            if limit and original.width * original.height > limit:
+                raise Image.DecompressionBombError(f'{original.width}x{original.height} pixels')
+            image = ImageOps.exif_transpose(original).convert('RGB')
+    except Image.DecompressionBombError:
+        logger.warning('Uploaded image %s is too large to process; serving the original', filename)
+        return False
+    except (OSError, ValueError):
+        logger.exception('Could not open uploaded image %s', filename)
+        return False
+
+    manifest = {'width': image.width, 'height': image.height, 'variants': {}}
+    for variant, width in IMAGE_VARIANTS.items():
+        width = min(width, image.width)
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        resized.save(os.path.join(upload_folder, _variant_name(filename, variant, 'webp')),
+                     'WEBP', quality=80, method=4)
+        resized.save(os.path.join(upload_folder, _variant_name(filename, variant, 'jpg')),
+                     'JPEG', quality=82, optimize=True, progressive=True)
+        manifest['variants'][variant] = width
+
+    tiny = image.resize((PLACEHOLDER_WIDTH, max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))),
+                        Image.BILINEAR)
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    manifest['placeholder'] = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+    # Write the manifest last and atomically: its presence means every variant is ready
+    manifest_path = _manifest_path(upload_folder, filename)
+    with open(manifest_path + '.tmp', 'w') as fh:
+        json.dump(manifest, fh)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return True
+
+
+def image_variants(filename):
+    """Return the variant manifest for an uploaded image, or None while it's unprocessed."""
+    if not filename:
+        return None
+    manifest = _manifests.get(filename)
+    if manifest is None:
+        try:
+            with open(_manifest_path(current_app.config['UPLOAD_FOLDER'], filename)) as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        # Manifests never change once written, so positive lookups are cached for good
+        _manifests[filename] = manifest
+    return manifest
+
+
+def image_srcset(filename, fmt='jpg'):
+    manifest = image_variants(filename)
+    if not manifest:
+        return ''
+    entries, seen_widths = [], set()
+    for variant, width in manifest['variants'].items():
+        # Small originals aren't upscaled, so several variants can share a width
+        if width in seen_widths:
+            continue
+        seen_widths.add(width)
+        entries.append(f"{url_for('static', filename='uploads/' + _variant_name(filename, variant, fmt))} {width}w")
+    return ', '.join(entries)
+
+
+def image_url(filename, variant='card', fmt='jpg'):
+    manifest = image_variants(filename)
+    if not manifest:
+        return url_for('static', filename='uploads/' + filename)
+    return url_for('static', filename='uploads/' + _variant_name(filename, variant, fmt))
@@ -0,0 +1,103 @@
+"""Commit latency of order confirmation for a large cart.
+
+Compares the previous write path (per-line Product.get plus one ORM add per OrderItem
+and Notification) with app.orders.place_order (reused product map, one multi-row INSERT
+per table). Run from the repository root:
+
+    python benchmarks/bench_confirm_order.py [--lines 50] [--rounds 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, db, search
+from app.cart import CartLine
+from app.models import User, Shop, Product, Order, OrderItem, Notification
+from app.orders import place_order
+
+
+def legacy_place_order(customer, quantities):
+    # The confirm_order body as it was before the bulk write path (per-line lookups and adds)
+    marketer_ids = set()
+    total_price = 0
+    for product_id, quantity in quantities.items():
+        product = db.session.get(Product, product_id)
+        marketer_ids.add(product.shop.owner.id)
+        total_price += product.price * quantity
+    new_order = Order(user_id=customer.id, total_price=total_price, status='Pending')
+    db.session.add(new_order)
+    db.session.flush()
+    for product_id, quantity in quantities.items():
+        product = db.session.get(Product, product_id)
+        db.session.add(OrderItem(order_id=new_order.id, product_id=product.id, shop_id=product.shop_id,
+                                 quantity=quantity, price_at_purchase=product.price))
+    for marketer_id in marketer_ids:
+        db.session.add(Notification(user_id=marketer_id, message=f"New order #{new_order.id}",
+                                    order_id=new_order.id))
+    db.session.commit()
+
+
+def bulk_place_order(customer, quantities):
+    products = Product.query.options(db.joinedload(Product.shop))\
+                            .filter(Product.id.in_(list(quantities))).all()
+    place_order(customer, [CartLine(p, quantities[p.id]) for p in products])
+    db.session.commit()
+
+
+def seed(lines):
+    customer = User(username='bench_customer', email='customer@bench.local', role='customer', is_approved=True)
+    db.session.add(customer)
+    shops = []
+    for i in range(10):
+        marketer = User(username=f'bench_marketer{i}', email=f'm{i}@bench.local', role='marketer', is_approved=True)
+        shop = Shop(name=f'Bench Shop {i}', owner=marketer)
+        db.session.add_all([marketer, shop])
+        shops.append(shop)
+    db.session.flush()
+    products = [Product(name=f'Bench Product {i}', price=100 + i, shop_id=shops[i % len(shops)].id, is_active=True)
+                for i in range(lines)]
+    db.session.add_all(products)
+    db.session.commit()
+    return customer, {p.id: 1 + i % 3 for i, p in enumerate(products)}
+
+
+def measure(fn, customer, quantities, rounds):
+    timings = []
+    for _ in range(rounds):
+        db.session.expire_all()
+        start = time.perf_counter()
+        fn(customer, quantities)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            search.create_index()
+            customer, quantities = seed(args.lines)
+            print(f'{args.lines}-line cart, {args.rounds} rounds (ms per confirmed order)')
+            for label, fn in (('legacy', legacy_place_order), ('bulk', bulk_place_order)):
+                timings = measure(fn, customer, quantities, args.rounds)
+                print(f'  {label:<7} median {statistics.median(timings):7.2f}  '
+                      f'p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Latency and query counts of the key data-layer paths at production-like volume.
+
+Seeds a scratch SQLite database with app.seed (or uses --database, assumed already
+seeded with `flask seed`), then requests the pages behind customer.search,
+customer.shop_detail, marketer.dashboard, admin.dashboard and the /api/v1 catalog
+through the test client with the page, fragment and admin stats caches off, so every
+request reaches the database. Reports median/p95 latency and the SQL statement count from the Server-Timing
+header. With --record the run is appended to benchmarks/results/data_layer.jsonl under
+the current commit; every run is compared with the last recorded one. Run from the
+repository root:
+
+    python benchmarks/bench_data_layer.py [--scale small|large] [--rounds 20] [--record]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func
+
+from config import Config
+from app import create_app, db
+from app.models import User, Shop, Product
+from app.seed import generate
+from tracking import change, last_recorded, record
+
+SCALES = {
+    'small': dict(customers=2000, marketers=100, products=20000, ratings=100000, orders=20000,
+                  notifications=20000),
+    'large': dict(customers=20000, marketers=500, products=100000, ratings=1000000, orders=100000,
+                  notifications=100000),
+}
+
+
+def make_config(uri):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        PAGE_CACHE_ENABLED = False
+        FRAGMENT_CACHE_ENABLED = False
+        ADMIN_STATS_TTL = 0
+        SQL_INSTRUMENTATION = True
+        SQL_SERVER_TIMING = True
+        SQL_DEBUG_PANEL = False
+        SQL_N_PLUS_ONE_THRESHOLD = 0
+        METRICS_ENABLED = False
+        WTF_CSRF_ENABLED = False
+    return BenchConfig
+
+
+def pick_subjects():
+    """The busiest marketer, shop and category, so each page shows its worst case."""
+    marketer_id = db.session.query(Shop.user_id).join(Product, Product.shop_id == Shop.id)\
+                            .group_by(Shop.user_id).order_by(func.count(Product.id).desc()).limit(1).scalar()
+    shop_id = db.session.query(Product.shop_id).group_by(Product.shop_id)\
+                        .order_by(func.count(Product.id).desc()).limit(1).scalar()
+    category_id = db.session.query(Product.category_id).filter(Product.category_id.isnot(None))\
+                            .group_by(Product.category_id).order_by(func.count(Product.id).desc())\
+                            .limit(1).scalar()
+    admin = User.query.filter_by(role='admin').first()
+    if admin is None:
+        admin = User(username='bench_admin', email='admin@bench.local', role='admin', is_approved=True)
+        db.session.add(admin)
+        db.session.commit()
+    return {'marketer_id': marketer_id, 'shop_id': shop_id, 'category_id': category_id,
+            'admin_id': admin.id}
+
+
+def cases(subjects):
+    """(name, path, user id to log in as or None)."""
+    return [
+        ('customer.search browse newest', '/search', None),
+        ('customer.search text', '/search?q=ankara+beads', None),
+        ('customer.search text by price', '/search?q=silk&sort_by=price_asc', None),
+        ('customer.search category', f"/search?category_id={subjects['category_id']}&sort_by=rating_desc", None),
+        ('customer.shop_detail', f"/shops/{subjects['shop_id']}", None),
+        ('marketer.dashboard', '/marketer/dashboard', subjects['marketer_id']),
+        ('admin.dashboard', '/admin/dashboard', subjects['admin_id']),
+        ('api.products newest', '/api/v1/products', None),
+        ('api.shop_products', f"/api/v1/shops/{subjects['shop_id']}/products", None),
+    ]
+
+
+def login_as(client, user_id):
+    with client.session_transaction() as session:
+        session.clear()
+        if user_id is not None:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+
+def measure(app, path, user_id, rounds):
+    client = app.test_client()
+    login_as(client, user_id)
+    client.get(path).get_data()  # warm the connection, templates and SQLite page cache
+    timings, queries = [], None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = client.get(path)
+        response.get_data()  # streamed bodies are only serialized when read
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f'{path} returned {response.status_code}')
+        match = re.search(r'(\d+) queries', response.headers.get('Server-Timing', ''))
+        queries = int(match.group(1)) if match else None
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'queries': queries,
+    }
+
+
+def run(uri, scale, rounds):
+    app = create_app(make_config(uri))
+    with app.app_context():
+        db.create_all()
+        if User.query.count() < 10:
+            started = time.perf_counter()
+            generate(**SCALES[scale])
+            print(f'seeded {scale} dataset in {time.perf_counter() - started:.1f}s')
+        subjects = pick_subjects()
+    return {name: measure(app, path, user_id, rounds) for name, path, user_id in cases(subjects)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--database', help='SQLAlchemy URL of an already seeded database')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--record', action='store_true',
+                        help='append the results to benchmarks/results/data_layer.jsonl')
+    args = parser.parse_args()
+
+    scale = args.scale if not args.database else 'custom'
+    if args.database:
+        results = run(args.database, scale, args.rounds)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", scale, args.rounds)
+
+    previous = last_recorded('data_layer', scale=scale)
+    header = f"{'path':<34}{'median ms':>10}{'p95 ms':>9}{'queries':>9}"
+    if previous:
+        header += f"   vs {previous['commit']}"
+    print(header)
+    for name, result in results.items():
+        line = f"{name:<34}{result['median_ms']:>10.2f}{result['p95_ms']:>9.2f}{result['queries'] or '-':>9}"
+        before = previous['results'].get(name) if previous else None
+        if before:
+            line += f"   {change(result['median_ms'], before['median_ms'])}"
+        print(line)
+
+    if args.record:
+        print('recorded in ' + record('data_layer', scale=scale, rounds=args.rounds, results=results))
+
+
+if __name__ == '__main__':
+    main()
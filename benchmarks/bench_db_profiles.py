@@ -0,0 +1,137 @@
+"""Concurrent read/write throughput for each database engine profile.
+
+Forks worker processes (like gunicorn workers) that run a storefront-style mix of reads
+(product listing page query) and writes (rating insert + aggregate update) for a fixed
+time, then reports operations per second and lock errors. SQLite is measured with the
+untuned 'default' profile and the tuned 'sqlite' profile; PostgreSQL is included when
+BENCH_POSTGRES_URL points at a scratch database. Run from the repository root:
+
+    python benchmarks/bench_db_profiles.py [--workers 4] [--seconds 5] [--write-ratio 0.2]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.exc import OperationalError
+
+from config import Config
+from app import create_app, db, search
+from app.models import User, Shop, Product, Rating
+
+
+def make_config(uri, profile):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        DATABASE_PROFILE = profile
+    return BenchConfig
+
+
+def seed(products=500, customers=200):
+    marketer = User(username='bench_marketer', email='m@bench.local', role='marketer', is_approved=True)
+    shop = Shop(name='Bench Shop', owner=marketer)
+    db.session.add_all([marketer, shop])
+    db.session.flush()
+    db.session.execute(db.insert(Product), [
+        {'name': f'Bench Product {i}', 'price': 100 + i, 'shop_id': shop.id, 'is_active': True}
+        for i in range(products)
+    ])
+    db.session.execute(db.insert(User), [
+        {'username': f'bench_customer{i}', 'email': f'c{i}@bench.local', 'role': 'customer', 'is_approved': True}
+        for i in range(customers)
+    ])
+    db.session.commit()
+
+
+def worker(uri, profile, workers, seconds, write_ratio, seed_value, results):
+    app = create_app(make_config(uri, profile))
+    rng = random.Random(seed_value)
+    reads = writes = errors = 0
+    with app.app_context():
+        product_ids = [pid for (pid,) in db.session.query(Product.id).all()]
+        customer_ids = [uid for (uid,) in db.session.query(User.id).filter(User.role == 'customer').all()]
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            try:
+                if rng.random() < write_ratio:
+                    # Workers walk disjoint (product, customer) pairs: one rating per pair
+                    pair = seed_value + writes * workers
+                    product = db.session.get(Product, product_ids[pair % len(product_ids)])
+                    customer_id = customer_ids[pair // len(product_ids) % len(customer_ids)]
+                    value = rng.randint(1, 5)
+                    db.session.add(Rating(value=value, product_id=product.id, shop_id=product.shop_id,
+                                          user_id=customer_id))
+                    product.apply_rating_delta(value, 1)
+                    db.session.commit()
+                    writes += 1
+                else:
+                    Product.query.filter_by(is_active=True)\
+                                 .order_by(Product.created_at.desc()).limit(24).all()
+                    db.session.commit()
+                    reads += 1
+            except OperationalError:
+                # 'database is locked' and friends
+                db.session.rollback()
+                errors += 1
+    results.put((reads, writes, errors))
+
+
+def run(uri, profile, args):
+    app = create_app(make_config(uri, profile))
+    with app.app_context():
+        db.create_all()
+        search.create_index()
+        seed()
+        db.engine.dispose()
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker,
+                                         args=(uri, profile, args.workers, args.seconds, args.write_ratio, i,
+                                               results))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+    totals = [0, 0, 0]
+    for _ in processes:
+        for i, value in enumerate(results.get()):
+            totals[i] += value
+    for process in processes:
+        process.join()
+
+    reads, writes, errors = totals
+    print(f'  {profile:<11} reads/s {reads / args.seconds:9.1f}   writes/s {writes / args.seconds:8.1f}   '
+          f'lock errors {errors}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f'{args.workers} worker processes, {args.seconds:g}s each, {args.write_ratio:.0%} writes')
+    for profile in ('default', 'sqlite'):
+        with tempfile.TemporaryDirectory() as tmp:
+            run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile, args)
+
+    postgres_url = os.getenv('BENCH_POSTGRES_URL')
+    if postgres_url:
+        app = create_app(make_config(postgres_url, 'postgresql'))
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            search.create_index()
+            db.engine.dispose()
+        run(postgres_url, 'postgresql', args)
+    else:
+        print('  postgresql  skipped (set BENCH_POSTGRES_URL to a scratch database)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Throughput and peak memory of the streaming CSV/JSONL exports.
+
+Seeds a scratch SQLite database with app.seed (or uses --database, assumed already
+seeded with `flask seed`), then downloads every dataset through admin.export with the
+test client, reading the body chunk by chunk as a client would. Reports rows, body size,
+rows per second and the peak Python memory allocated while streaming (tracemalloc), which
+should stay flat as the row count grows. With --record the run is appended to
+benchmarks/results/export.jsonl. Run from the repository root:
+
+    python benchmarks/bench_export.py [--orders 100000] [--format csv|jsonl] [--gzip] [--record]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, db
+from app.exports import DATASETS
+from app.models import User
+from app.seed import generate
+from tracking import change, last_recorded, record
+
+
+def make_config(uri):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQL_INSTRUMENTATION = False
+        METRICS_ENABLED = False
+    return BenchConfig
+
+
+def admin_id():
+    admin = User.query.filter_by(role='admin').first()
+    if admin is None:
+        admin = User(username='bench_admin', email='admin@bench.local', role='admin', is_approved=True)
+        db.session.add(admin)
+        db.session.commit()
+    return admin.id
+
+
+def measure(app, user_id, dataset, fmt, compress):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    headers = {'Accept-Encoding': 'gzip'} if compress else {}
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(f'/admin/export?dataset={dataset}&format={fmt}', headers=headers, buffered=False)
+    if response.status_code != 200:
+        raise SystemExit(f'{dataset} export returned {response.status_code}')
+    size, lines, decompressor = 0, 0, None
+    if compress:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in response.response:
+        size += len(chunk)
+        lines += (decompressor.decompress(chunk) if decompressor else chunk).count(b'\n')
+    response.close()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    rows = lines - 1 if fmt == 'csv' else lines
+    return {
+        'rows': rows,
+        'bytes': size,
+        'seconds': round(elapsed, 3),
+        'rows_per_s': round(rows / elapsed) if elapsed else None,
+        'peak_kb': round(peak / 1024),
+    }
+
+
+def run(uri, orders, fmt, compress):
+    app = create_app(make_config(uri))
+    with app.app_context():
+        db.create_all()
+        if User.query.count() < 10:
+            started = time.perf_counter()
+            generate(customers=orders // 10, marketers=max(10, orders // 1000), products=orders // 2,
+                     ratings=0, orders=orders, notifications=0)
+            print(f'seeded {orders:,} orders in {time.perf_counter() - started:.1f}s')
+        user_id = admin_id()
+    return {dataset: measure(app, user_id, dataset, fmt, compress) for dataset in DATASETS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--database', help='SQLAlchemy URL of an already seeded database')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+    parser.add_argument('--gzip', action='store_true', help='request a gzip-compressed body')
+    parser.add_argument('--record', action='store_true',
+                        help='append the results to benchmarks/results/export.jsonl')
+    args = parser.parse_args()
+
+    if args.database:
+        results = run(args.database, args.orders, args.format, args.gzip)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run(f"sqlite:///{os.path.join(tmp, 'export.db')}", args.orders, args.format, args.gzip)
+
+    match = {'format': args.format, 'gzip': args.gzip}
+    previous = last_recorded('export', **match)
+    header = f"{'dataset':<14}{'rows':>11}{'MB':>9}{'rows/s':>11}{'peak KB':>10}"
+    if previous:
+        header += f"   vs {previous['commit']}"
+    print(header)
+    for dataset, result in results.items():
+        line = (f"{dataset:<14}{result['rows']:>11,}{result['bytes'] / 1e6:>9.1f}"
+                f"{result['rows_per_s'] or 0:>11,}{result['peak_kb']:>10,}")
+        before = previous['results'].get(dataset) if previous else None
+        if before and before['seconds']:
+            line += f"   {change(result['seconds'] * 1000, before['seconds'] * 1000)}"
+        print(line)
+
+    if args.record:
+        print('recorded in ' + record('export', orders=args.orders, results=results, **match))
+
+
+if __name__ == '__main__':
+    main()
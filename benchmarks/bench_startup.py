@@ -0,0 +1,115 @@
+"""Cold-start cost of a web worker: interpreter + imports, create_app() and the first request.
+
+Each run is a fresh Python process (what a new gunicorn worker or autoscaled instance
+pays) against a scratch SQLite database that was bootstrapped beforehand, so create_app()
+itself must not touch the schema. Reports medians, flags heavy modules that leaked into
+the worker imports, and fails with exit status 1 when the median total exceeds
+--max-total-ms. With --record the run is appended to benchmarks/results/startup.jsonl.
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--runs 10] [--max-total-ms 3000] [--record]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tracking import ROOT, change, last_recorded, record
+
+# Only needed by CLI commands; a worker importing them is a regression
+CLI_ONLY_MODULES = ('alembic', 'flask_migrate')
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+import app
+from config import Config
+imported = time.perf_counter()
+
+class StartupConfig(Config):
+    SQLALCHEMY_DATABASE_URI = sys.argv[1]
+
+application = app.create_app(StartupConfig)
+created = time.perf_counter()
+response = application.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'status': response.status_code,
+    'cli_only_modules': [name for name in sys.argv[2:] if name in sys.modules],
+}))
+'''
+
+
+def bootstrap(uri):
+    from config import Config
+    from app import create_app, db, search
+
+    class BootstrapConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+
+    app = create_app(BootstrapConfig)
+    with app.app_context():
+        db.create_all()
+        search.create_index()
+        db.engine.dispose()
+
+
+def run_once(uri):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD, uri, *CLI_ONLY_MODULES], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['total_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-total-ms', type=float, help='fail when the median total is slower')
+    parser.add_argument('--record', action='store_true',
+                        help='append the results to benchmarks/results/startup.jsonl')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        bootstrap(uri)
+        runs = [run_once(uri) for _ in range(args.runs)]
+
+    statuses = {run['status'] for run in runs}
+    if statuses != {200}:
+        raise SystemExit(f'first request returned {sorted(statuses)}')
+    results = {key: round(statistics.median(run[key] for run in runs), 1)
+               for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms')}
+    leaked = sorted({name for run in runs for name in run['cli_only_modules']})
+
+    previous = last_recorded('startup')
+    print(f"{args.runs} fresh processes (median ms)" + (f"   vs {previous['commit']}" if previous else ''))
+    for key, value in results.items():
+        line = f'  {key:<18}{value:>9.1f}'
+        if previous and previous['results'].get(key):
+            line += f"   {change(value, previous['results'][key])}"
+        print(line)
+    if leaked:
+        print(f"  CLI-only modules imported by the worker: {', '.join(leaked)}")
+
+    if args.record:
+        print('recorded in ' + record('startup', runs=args.runs, results=results, cli_only_modules=leaked))
+
+    if args.max_total_ms and results['total_ms'] > args.max_total_ms:
+        print(f"median total {results['total_ms']:.1f} ms exceeds --max-total-ms {args.max_total_ms:g}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Check that the hot customer, marketer and admin queries are served by an index.
+
+Storefront queries are captured from the app/catalog.py functions themselves, run inside a
+request (with a page cursor where they paginate), so the keyset filters and the full-text
+join are exactly what the views send; the rest are built the way the views do. Each runs
+through SQLite's EXPLAIN QUERY PLAN, which must name the expected index instead of a full
+table scan; keyset listings must also take their order from it rather than a temp B-tree.
+Exits non-zero when a plan regresses, so it can gate CI. Run from the repository root:
+
+    python benchmarks/explain_hot_queries.py [--verbose]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import contains_eager, joinedload
+
+from config import Config
+from app import create_app, catalog, db
+from app.models import User, Shop, Product, Rating, Order, OrderItem, Notification
+from app.pagination import encode_cursor, keyset_paginate
+
+# A second-page cursor, so keyset queries carry their (key, id) seek condition
+PAGE_TWO = {'after': encode_cursor([datetime(2026, 1, 1), 1000])}
+PRICE_PAGE_TWO = {'after': encode_cursor([15000.0, 1000])}
+RATING_PAGE_TWO = {'after': encode_cursor([4.5, 1000])}
+
+
+class Captured:
+    """The first SELECT a catalog function sends, run in a request with `args`."""
+
+    def __init__(self, call, **args):
+        self.call = call
+        self.args = args
+
+    def statement(self, app):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            with app.test_request_context(query_string=self.args):
+                self.call()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return statements[0]
+
+
+def hot_queries():
+    """(area, description, statement, expected index, ordered) for each query shape we care about.
+
+    The expected index may be a tuple when the planner is free to pick any of several.
+    `ordered` shapes are keyset listings whose ORDER BY must come from the index: a temp
+    B-tree there means every page sorts the whole table.
+    """
+    shop_ids = [1, 2, 3]
+    return [
+        ('customer', 'home page: newest active products',
+         Captured(catalog.featured_products),
+         'ix_product_is_active_created_at', True),
+        ('customer', 'shop page: active products with categories',
+         Captured(lambda: catalog.shop_products(1)),
+         'ix_product_shop_id_is_active_category_id', False),
+        ('customer', 'search: newest active products in a category, page 2',
+         Captured(lambda: catalog.search_products(category_id=1), **PAGE_TWO),
+         'ix_product_is_active_created_at', True),
+        ('customer', 'search: cheapest first, page 2',
+         Captured(lambda: catalog.search_products(sort_by='price_asc'), **PRICE_PAGE_TWO),
+         'ix_product_is_active_price_id', True),
+        ('customer', 'search: dearest first, page 2',
+         Captured(lambda: catalog.search_products(sort_by='price_desc'), **PRICE_PAGE_TWO),
+         'ix_product_is_active_price_id', True),
+        ('customer', 'search: best rated first, page 2',
+         Captured(lambda: catalog.search_products(sort_by='rating_desc'), **RATING_PAGE_TWO),
+         'ix_product_is_active_rating_avg_id', True),
+        ('customer', 'search: full-text matches',
+         Captured(lambda: catalog.search_products('ankara')),
+         'product_search VIRTUAL TABLE', False),
+        ('customer', 'shop list: newest first, page 2',
+         Captured(catalog.list_shops, **PAGE_TWO),
+         'ix_shop_created_at_id', True),
+        ('customer', 'product page: ratings, page 2',
+         Captured(lambda: catalog.product_ratings(1), **PAGE_TWO),
+         'ix_rating_product_id_user_id', False),
+        ('customer', 'rate product: existing rating lookup',
+         Rating.query.filter_by(product_id=1, user_id=1),
+         'ix_rating_product_id_user_id', False),
+        ('customer', 'order history',
+         Order.query.filter(Order.user_id == 1).order_by(Order.created_at.desc()).limit(5),
+         'ix_order_user_id_created_at', True),
+        ('marketer', 'my products, newest first, page 2',
+         # As marketer.manage_products builds it; the sort covers only this marketer's products
+         Captured(lambda: keyset_paginate(Product.query.join(Shop)
+                                          .options(contains_eager(Product.shop), joinedload(Product.category))
+                                          .filter(Shop.user_id == 1),
+                                          [Product.created_at, Product.id]), **PAGE_TWO),
+         'ix_shop_user_id', False),
+        ('marketer', 'orders containing my shops\' items',
+         select(OrderItem.order_id).where(OrderItem.shop_id.in_(shop_ids)).distinct(),
+         'ix_order_item_shop_id', False),
+        ('marketer', 'shop products by category',
+         Product.query.filter(Product.shop_id == 1, Product.is_active == True, Product.category_id == 1),
+         'ix_product_shop_id_is_active_category_id', False),
+        ('marketer', 'unread notifications, newest first',
+         Notification.query.filter_by(user_id=1, is_read=False).order_by(Notification.created_at.desc()),
+         'ix_notification_user_id_is_read_created_at', True),
+        ('marketer', 'all notifications',
+         Notification.query.filter_by(user_id=1).order_by(Notification.created_at.desc()),
+         'ix_notification_user_id_is_read_created_at', False),
+        # The admin lists as admin.user_list, shop_list and product_list build them
+        ('admin', 'user list, page 2',
+         Captured(lambda: keyset_paginate(User.query, [User.created_at, User.id]), **PAGE_TWO),
+         'ix_user_created_at_id', True),
+        ('admin', 'shop list, page 2',
+         Captured(lambda: keyset_paginate(Shop.query.options(joinedload(Shop.owner)),
+                                          [Shop.created_at, Shop.id]), **PAGE_TWO),
+         'ix_shop_created_at_id', True),
+        ('admin', 'product list, page 2',
+         Captured(lambda: keyset_paginate(Product.query.options(joinedload(Product.shop),
+                                                                joinedload(Product.category)),
+                                          [Product.created_at, Product.id]), **PAGE_TWO),
+         'ix_product_created_at_id', True),
+        ('admin', 'dashboard: active product count',
+         select(func.count(Product.id)).where(Product.is_active == True),
+         ('ix_product_is_active_created_at', 'ix_product_is_active_price_id',
+          'ix_product_is_active_rating_avg_id'), False),
+        ('admin', 'delete shop: the shop\'s products',
+         Product.query.filter(Product.shop_id == 1),
+         'ix_product_shop_id_is_active_category_id', False),
+        ('admin', 'delete shop: order lines to detach',
+         select(OrderItem.id).where(OrderItem.shop_id == 1),
+         'ix_order_item_shop_id', False),
+        ('admin', 'delete user: the user\'s notifications',
+         select(Notification.id).where(Notification.user_id == 1),
+         'ix_notification_user_id_is_read_created_at', False),
+    ]
+
+
+def check_plan(plan, index, ordered):
+    """The problems with `plan`, or an empty list when it uses the index as expected."""
+    indexes = (index,) if isinstance(index, str) else index
+    problems = []
+    if not any(name in line for line in plan for name in indexes):
+        problems.append(f"expected {' or '.join(indexes)}")
+    if ordered and any('TEMP B-TREE FOR ORDER BY' in line for line in plan):
+        problems.append('expected the index to provide the order')
+    return problems
+
+
+def explain(app, statement):
+    connection = db.session.connection()
+    if isinstance(statement, Captured):
+        sql, parameters = statement.statement(app)
+    else:
+        statement = getattr(statement, 'statement', statement)  # Query -> Select
+        # Parameters are plain ints and booleans, so inline them (this also expands IN lists)
+        sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+        parameters = ()
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parameters).all()
+    return [row[-1] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='print every query plan')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class ExplainConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'explain.db')}"
+
+        app = create_app(ExplainConfig)
+        failures = 0
+        with app.app_context():
+            db.create_all()
+            for area, description, statement, index, ordered in hot_queries():
+                plan = explain(app, statement)
+                problems = check_plan(plan, index, ordered)
+                failures += bool(problems)
+                print(f"  {'FAIL' if problems else 'ok  '} {area:<9} {description}")
+                if args.verbose or problems:
+                    for line in plan:
+                        print(f'         {line}')
+                    for problem in problems:
+                        print(f'         {problem}')
+
+    print('all hot queries use their index' if not failures else f'{failures} query plan(s) regressed')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
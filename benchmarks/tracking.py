@@ -0,0 +1,54 @@
+"""Helpers for keeping benchmark results in benchmarks/results/*.jsonl across commits.
+
+The results directory is local and untracked: timings only compare against earlier runs
+on the same machine, so record a baseline on a clean checkout before measuring a change.
+"""
+import json
+import os
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def results_path(name):
+    return os.path.join(RESULTS_DIR, f'{name}.jsonl')
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def last_recorded(name, **match):
+    """The most recent entry whose fields equal `match`, or None."""
+    path = results_path(name)
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path) as f:
+        for line in f:
+            entry = json.loads(line)
+            if all(entry.get(key) == value for key, value in match.items()):
+                previous = entry
+    return previous
+
+
+def record(name, **entry):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    entry = {'commit': git_commit(), 'date': datetime.utcnow().isoformat(timespec='seconds'), **entry}
+    with open(results_path(name), 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    return os.path.relpath(results_path(name), ROOT)
+
+
+def change(current, previous):
+    """'+12% (was 3.40)' style comparison of two millisecond figures."""
+    return f'{(current - previous) / previous * 100:+.0f}% (was {previous:.2f})'
@@ -5,13 +5,115 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here-CHANGE-THIS-IN-PRODUCTION')
 
     # Database
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///marketplace.db'
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///marketplace.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Engine profile: 'sqlite', 'postgresql' or 'default' (untuned); detected from the URI
+    # when unset. See app/db_profiles.py
+    DATABASE_PROFILE = os.getenv('DATABASE_PROFILE')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 15000))
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.getenv('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', 60000))
+
     # File Uploads
     UPLOAD_FOLDER = 'app/static/uploads'
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # 2MB
+    IMAGE_PROCESS_ASYNC = True  # resize uploads on a background thread
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+    # Static assets: fingerprinted URLs with immutable caching (disabled under the debugger);
+    # bundling concatenates the page scripts into one file, minified if rjsmin is installed
+    ASSET_FINGERPRINTING = True
+    ASSET_BUNDLING = os.getenv('ASSET_BUNDLING', 'false').lower() == 'true'
+    ASSET_MINIFY = True
+    ASSET_BUNDLES = {
+        'js/bundle.js': ['js/main.js', 'js/customer.js', 'js/marketer.js', 'js/admin.js'],
+    }
+
+    # Bulk product imports (CSV/JSONL plus an optional image zip). Uploaded files wait in
+    # IMPORT_FOLDER (default: <instance folder>/imports) until a background worker imports them
+    IMPORT_FOLDER = os.getenv('IMPORT_FOLDER')
+    IMPORT_MAX_CONTENT_LENGTH = int(os.getenv('IMPORT_MAX_CONTENT_LENGTH', 200 * 1024 * 1024))  # bytes
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 5000))  # products per transaction
+    IMPORT_MAX_ERRORS = 1000  # row errors kept for the report
+    IMPORT_ASYNC = True
+    IMPORT_WORKERS = 1  # imports run one at a time per process
+
+    # CSV/JSONL exports: rows fetched per server-side cursor round trip, and gzip level
+    EXPORT_YIELD_PER = int(os.getenv('EXPORT_YIELD_PER', 2000))
+    EXPORT_GZIP_LEVEL = int(os.getenv('EXPORT_GZIP_LEVEL', 6))
+
+    # Listings (rows per keyset-paginated page)
+    ITEMS_PER_PAGE = int(os.getenv('ITEMS_PER_PAGE', 24))
+
+    # Read-only JSON catalog API (/api/v1)
+    API_MAX_PER_PAGE = int(os.getenv('API_MAX_PER_PAGE', 100))
+    API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', 60))  # seconds clients may reuse a response
+
+    # Full-page cache for anonymous storefront visitors (index, shop list, shop detail)
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', 60))  # seconds
+    PAGE_CACHE_MAX_ENTRIES = 1024
+
+    # Rendered product/shop cards, keyed on id + cache_version
+    FRAGMENT_CACHE_ENABLED = os.getenv('FRAGMENT_CACHE_ENABLED', 'true').lower() == 'true'
+    FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', 300))  # seconds
+    FRAGMENT_CACHE_MAX_ENTRIES = 4096
+
+    # Seconds the admin dashboard's platform-wide counts are reused
+    ADMIN_STATS_TTL = int(os.getenv('ADMIN_STATS_TTL', 30))
+
+    # Logged-in user rows cached per process for the login loader, on storefront GETs only:
+    # writes and admin/marketer pages always load the row, so role, approval and deletion
+    # apply at once. Storefront pages pick up other users' edits to a row within TTL
+    USER_CACHE_ENABLED = os.getenv('USER_CACHE_ENABLED', 'true').lower() == 'true'
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))  # seconds
+    USER_CACHE_MAX_ENTRIES = 10000
+
+    # Shopping cart storage: 'database' (default) or 'memory' (tests / single process).
+    # `flask prune-carts` deletes carts untouched for CART_TTL_DAYS; run it daily
+    CART_BACKEND = os.getenv('CART_BACKEND', 'database')
+    CART_TTL_DAYS = int(os.getenv('CART_TTL_DAYS', 30))
+
+    # Live marketer notifications over Server-Sent Events. Each open stream holds a request
+    # for up to SSE_MAX_DURATION, so they're off by default: a sync gunicorn worker would be
+    # pinned by one marketer tab (and killed at its timeout). Turn NOTIFICATION_STREAM on
+    # only with threaded or async workers (e.g. `gunicorn -k gthread --threads 16`); pages
+    # then show the unread count from the last render. 'memory' fans out inside one
+    # process; use 'database' (each stream polls) when running several worker processes
+    NOTIFICATION_STREAM = os.getenv('NOTIFICATION_STREAM', 'false').lower() == 'true'
+    NOTIFICATION_HUB = os.getenv('NOTIFICATION_HUB', 'memory')
+    NOTIFICATION_POLL_INTERVAL = float(os.getenv('NOTIFICATION_POLL_INTERVAL', 3))  # seconds
+    SSE_HEARTBEAT = 15  # seconds between keep-alive comments
+    SSE_MAX_DURATION = 300  # seconds before the server ends a stream and the browser reconnects
+    SSE_RETRY_MS = 3000
+
+    # Per-request SQL accounting: query count and DB time go out as a Server-Timing header;
+    # the debug panel (defaults to on under the debugger) lists every statement shape.
+    # A shape run more than SQL_N_PLUS_ONE_THRESHOLD times in one request is logged as a
+    # likely N+1, or raises NPlusOneError with SQL_N_PLUS_ONE_ACTION='raise' (0 disables)
+    SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', 'true').lower() == 'true'
+    SQL_SERVER_TIMING = os.getenv('SQL_SERVER_TIMING', 'true').lower() == 'true'
+    SQL_DEBUG_PANEL = None
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', 10))
+    SQL_N_PLUS_ONE_ACTION = os.getenv('SQL_N_PLUS_ONE_ACTION', 'log')  # 'log' or 'raise'
+
+    # Prometheus metrics at /metrics, readable by admins and by scrapers from these
+    # addresses (the direct peer address; list the proxy if one sits in front). Under
+    # gunicorn set METRICS_DIR to a directory shared by the workers and emptied on start
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+                           if ip.strip()]
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))  # seconds
+    METRICS_PREFIX = 'marketplace_'
 
     # Admin Credentials (override with env vars in production)
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
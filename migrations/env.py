@@ -90,9 +90,18 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # the full-text search tables (and FTS5 shadow tables) are managed by
+    # app/search.py rather than the models, so keep autogenerate away from them
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == 'table' and name.startswith(('product_search', 'shop_search')):
+            return False
+        return True
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
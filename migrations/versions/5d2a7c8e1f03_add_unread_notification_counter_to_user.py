@@ -0,0 +1,33 @@
+"""Add stored unread notification counter to User
+
+Revision ID: 5d2a7c8e1f03
+Revises: 9b3e6f1a2c47
+Create Date: 2026-10-17 13:21:47.918302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a7c8e1f03'
+down_revision = '9b3e6f1a2c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notifications', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the existing notifications
+    op.execute(
+        'UPDATE "user" SET unread_notifications = '
+        '(SELECT COUNT(*) FROM notification WHERE notification.user_id = "user".id '
+        'AND notification.is_read = false)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('unread_notifications')
@@ -0,0 +1,41 @@
+"""Add denormalized rating aggregates to Product and Shop
+
+Revision ID: 76dfce112d50
+Revises: c408105f3fb8
+Create Date: 2026-10-17 09:12:41.503128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '76dfce112d50'
+down_revision = 'c408105f3fb8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('product', 'shop'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('rating_avg', sa.Float(), nullable=False, server_default='0'))
+
+    # Backfill from the existing ratings
+    for table, fk in (('product', 'product_id'), ('shop', 'shop_id')):
+        op.execute(
+            f"UPDATE {table} SET "
+            f"rating_count = (SELECT COUNT(*) FROM rating WHERE rating.{fk} = {table}.id), "
+            f"rating_sum = (SELECT COALESCE(SUM(value), 0) FROM rating WHERE rating.{fk} = {table}.id), "
+            f"rating_avg = (SELECT COALESCE(AVG(value), 0) FROM rating WHERE rating.{fk} = {table}.id)"
+        )
+
+
+def downgrade():
+    for table in ('shop', 'product'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('rating_avg')
+            batch_op.drop_column('rating_sum')
+            batch_op.drop_column('rating_count')
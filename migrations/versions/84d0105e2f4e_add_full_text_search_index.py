@@ -0,0 +1,76 @@
+"""Add full-text search index for products and shops
+
+Revision ID: 84d0105e2f4e
+Revises: 76dfce112d50
+Create Date: 2026-10-17 10:03:18.774512
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '84d0105e2f4e'
+down_revision = '76dfce112d50'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5("
+            "name, description, shop_name, category, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS shop_search USING fts5("
+            "name, description, location, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute("DELETE FROM product_search")
+        op.execute("DELETE FROM shop_search")
+        op.execute(
+            "INSERT INTO product_search (rowid, name, description, shop_name, category) "
+            "SELECT product.id, product.name, COALESCE(product.description, ''), "
+            "COALESCE(shop.name, ''), COALESCE(category.name, '') FROM product "
+            "LEFT JOIN shop ON shop.id = product.shop_id "
+            "LEFT JOIN category ON category.id = product.category_id"
+        )
+        op.execute(
+            "INSERT INTO shop_search (rowid, name, description, location) "
+            "SELECT shop.id, shop.name, COALESCE(shop.description, ''), COALESCE(shop.location, '') "
+            "FROM shop"
+        )
+    elif dialect == 'postgresql':
+        for table in ('product_search', 'shop_search'):
+            op.execute(f"CREATE TABLE IF NOT EXISTS {table} (rowid INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)")
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_document ON {table} USING GIN (document)")
+            op.execute(f"DELETE FROM {table}")
+        op.execute(
+            "INSERT INTO product_search (rowid, document) "
+            "SELECT product.id, "
+            "setweight(to_tsvector('simple', product.name), 'A') || "
+            "setweight(to_tsvector('simple', COALESCE(category.name, '')), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(shop.name, '')), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(product.description, '')), 'C') "
+            "FROM product "
+            "LEFT JOIN shop ON shop.id = product.shop_id "
+            "LEFT JOIN category ON category.id = product.category_id"
+        )
+        op.execute(
+            "INSERT INTO shop_search (rowid, document) "
+            "SELECT shop.id, "
+            "setweight(to_tsvector('simple', shop.name), 'A') || "
+            "setweight(to_tsvector('simple', COALESCE(shop.location, '')), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(shop.description, '')), 'C') "
+            "FROM shop"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        op.execute("DROP TABLE IF EXISTS shop_search")
+        op.execute("DROP TABLE IF EXISTS product_search")